@@ -1,11 +1,31 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 import time
-import json
 import os
+import threading
 from datetime import datetime
 from enum import Enum
-import threading
+
+import workout_catalog
+import workout_planner
+import workout_stats
+import workout_storage
+import workout_timer
+import workout_views
+
+# Only the most recent workouts are read at startup; older ones are loaded
+# on demand
+HISTORY_WINDOW = 20
+
+# Search boxes wait this long after the last keystroke before querying
+SEARCH_DEBOUNCE_MS = 200
+
+# Milliseconds from startup to the first painted window; going over is
+# reported on the console
+STARTUP_BUDGET_MS = 250
+
+# How often the UI checks whether the background data load has finished
+LOAD_POLL_MS = 50
 
 class MuscleGroup(str, Enum):
     CHEST = "Chest"
@@ -15,6 +35,10 @@ class MuscleGroup(str, Enum):
     TRICEPS = "Triceps"
     LEGS = "Legs"
     CORE = "Core"
+    
+    @property
+    def bit(self):
+        return workout_catalog.MUSCLE_GROUP_BITS[self.value]
 
 class Exercise:
     def __init__(self, id, name, muscle_groups, description, equipment_needed=None, 
@@ -22,6 +46,7 @@ class Exercise:
         self.id = id
         self.name = name
         self.muscle_groups = muscle_groups if isinstance(muscle_groups, list) else [muscle_groups]
+        self.muscle_mask = workout_catalog.muscle_mask(self.muscle_groups)
         self.description = description
         self.equipment_needed = equipment_needed
         self.difficulty_level = difficulty_level
@@ -40,20 +65,44 @@ class Exercise:
 
 class WorkoutAppGUI:
     def __init__(self, root):
+        self.startup_started = time.perf_counter()
         self.root = root
         self.root.title("Workout App")
         self.root.geometry("800x600")
         self.root.minsize(800, 600)
-        
-        self.exercises = self._load_exercise_database()
-        self.workout_history = self._load_workout_history()
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+        
+        # All saves go through the background writer so the UI never blocks on disk
+        self.writer = workout_storage.BackgroundWriter()
+        self.writer_watch_id = None
+        self.save_status_var = tk.StringVar(value="")
+        
+        # The catalog, history and the aggregates built from them are loaded
+        # on a background thread (see _load_data); until they arrive the
+        # tabs that need them show a placeholder
+        self.data_loaded = False
+        self.loaded_data = None
+        self.exercises = {}
+        self.exercise_index = None
+        self.workout_history = None
+        self.dashboard_stats = None
+        self.personal_records = None
+        self.fatigue = None
+        self.set_timing = None
+        self.plan_validator = None
+        self.duration_estimator = None
+        self.workout_generator = None
         
         self.current_workout = []
+        self.plan_seconds = 0
         self.current_exercise_index = 0
         self.current_set = 1
         self.timer_running = False
-        self.timer_thread = None
-        self.stop_timer = threading.Event()
+        
+        # Set, rest and session countdowns all run from one scheduler on the
+        # Tk event loop rather than a thread each
+        self.timer_scheduler = workout_timer.TimerScheduler(root)
+        self.debounce_ids = {}
             
         # Create tabs
         self.tab_control = ttk.Notebook(root)
@@ -72,19 +121,108 @@ class WorkoutAppGUI:
         
         self.tab_control.pack(expand=1, fill="both")
         
-        # Set up each tab
-        self._setup_home_tab()
-        self._setup_exercises_tab()
-        self._setup_create_workout_tab()
-        self._setup_active_workout_tab()
-        self._setup_history_tab()
+        # Save status bar
+        ttk.Label(root, textvariable=self.save_status_var, anchor="w").pack(fill="x", padx=5)
+        
+        # Each tab is built the first time it is selected; those that show
+        # loaded data wait for it behind a placeholder
+        self.tab_builders = {
+            str(self.tab_home): (self._setup_home_tab, False),
+            str(self.tab_exercises): (self._setup_exercises_tab, True),
+            str(self.tab_create_workout): (self._setup_create_workout_tab, True),
+            str(self.tab_active_workout): (self._setup_active_workout_tab, True),
+            str(self.tab_history): (self._setup_history_tab, True),
+        }
+        self.tab_placeholders = {}
+        self.tab_control.bind("<<NotebookTabChanged>>", lambda e: self._build_tab(str(self.tab_control.select())))
+        self._build_tab(str(self.tab_home))
         
         # Initially disable the Active Workout tab
         self.tab_control.tab(3, state="disabled")
+        
+        self.loader = threading.Thread(target=self._load_data, daemon=True)
+        self.loader.start()
+        self.root.after(LOAD_POLL_MS, self._check_loaded)
+        self.root.after_idle(self._check_startup_budget)
     
-    def _load_exercise_database(self):
+    def _build_tab(self, tab):
+        if tab not in self.tab_builders:
+            return
+        
+        builder, needs_data = self.tab_builders[tab]
+        if needs_data and not self.data_loaded:
+            if tab not in self.tab_placeholders:
+                self.tab_placeholders[tab] = ttk.Label(self.root.nametowidget(tab), text="Loading workout data...")
+                self.tab_placeholders[tab].pack(expand=True)
+            return
+        
+        del self.tab_builders[tab]
+        placeholder = self.tab_placeholders.pop(tab, None)
+        if placeholder is not None:
+            placeholder.destroy()
+        builder()
+    
+    def _check_startup_budget(self):
+        # Runs once the window's first layout and redraw are done
+        self.root.update_idletasks()
+        startup_ms = (time.perf_counter() - self.startup_started) * 1000
+        if startup_ms > STARTUP_BUDGET_MS:
+            print(f"Startup took {startup_ms:.0f} ms (budget {STARTUP_BUDGET_MS} ms)")
+    
+    def _load_data(self):
+        # Loader thread: no Tk calls here, everything is handed over in
+        # _finish_loading on the UI thread
+        exercises = self._load_exercise_database()
+        exercise_index = workout_catalog.ExerciseIndex(exercises.values())
+        workout_history = self._load_workout_history()
+        self.loaded_data = {
+            "exercises": exercises,
+            "exercise_index": exercise_index,
+            "workout_history": workout_history,
+            "dashboard_stats": workout_stats.load_aggregate(
+                "workout_stats.json", workout_history, workout_stats.DashboardStats),
+            "personal_records": workout_stats.load_aggregate(
+                "personal_records.json", workout_history, workout_stats.PersonalRecords),
+            "fatigue": workout_stats.load_aggregate(
+                "fatigue.json", workout_history, workout_stats.FatigueModel,
+                exercise_masks={ex_id: ex.muscle_mask for ex_id, ex in exercises.items()}),
+            "set_timing": workout_stats.load_aggregate(
+                "set_timing.json", workout_history, workout_stats.SetTimingStats,
+                exercise_rest={ex_id: ex.recommended_rest for ex_id, ex in exercises.items()}),
+        }
+    
+    def _check_loaded(self):
+        if self.loader.is_alive():
+            self.root.after(LOAD_POLL_MS, self._check_loaded)
+        elif self.loaded_data is None:
+            # The loader died; its traceback is on the console
+            messagebox.showerror("Workout App", "Could not load workout data.")
+        else:
+            self._finish_loading(self.loaded_data)
+    
+    def _finish_loading(self, data):
+        self.loaded_data = None
+        self.exercises = data["exercises"]
+        self.exercise_index = data["exercise_index"]
+        self.workout_history = data["workout_history"]
+        self.dashboard_stats = data["dashboard_stats"]
+        self.personal_records = data["personal_records"]
+        self.fatigue = data["fatigue"]
+        self.set_timing = data["set_timing"]
+        self.plan_validator = workout_planner.PlanValidator(self.fatigue)
+        self.duration_estimator = workout_planner.DurationEstimator(self.set_timing)
+        self.workout_generator = workout_planner.WorkoutGenerator(
+            self.exercise_index, self.duration_estimator.exercise_seconds)
+        self.data_loaded = True
+        
+        self._refresh_home_stats()
+        self._build_tab(str(self.tab_control.select()))
+        # Saves queued while loading (e.g. a first-run default catalog)
+        self._watch_writer()
+    
+    def _default_exercises(self):
         # Default exercise database if file doesn't exist
-        default_exercises = {
+        return {
             "push-up-001": Exercise(
                 "push-up-001",
                 "Push-ups",
@@ -167,33 +305,37 @@ class WorkoutAppGUI:
                 60
             )
         }
-        
+    
+    def _load_exercise_database(self):
         try:
             if os.path.exists("exercise_database.json"):
-                with open("exercise_database.json", "r") as f:
-                    data = json.load(f)
-                    exercises = {}
-                    for key, ex in data.items():
-                        exercises[key] = Exercise(
-                            ex["id"],
-                            ex["name"],
-                            [MuscleGroup(mg) for mg in ex["muscle_groups"]],
-                            ex["description"],
-                            ex["equipment_needed"],
-                            ex["difficulty_level"],
-                            ex["recommended_rest"]
-                        )
-                    return exercises
+                # Served from the compiled cache unless the JSON file has changed
+                records = workout_storage.load_exercise_records("exercise_database.json")
+                exercises = {}
+                for key, ex in records.items():
+                    ex_id, name, muscle_groups, description, equipment_needed, difficulty_level, recommended_rest = ex
+                    exercises[key] = Exercise(
+                        ex_id,
+                        name,
+                        [MuscleGroup(mg) for mg in muscle_groups],
+                        description,
+                        equipment_needed,
+                        difficulty_level,
+                        recommended_rest
+                    )
+                return exercises
             
             # If we got here, either the file doesn't exist or there was an error
             # Save the default exercises to the file
+            default_exercises = self._default_exercises()
             self._save_exercise_database(default_exercises)
+            return default_exercises
                     
         except Exception as e:
             print(f"Error loading exercise database: {e}")
             print("Using default exercise database.")
         
-        return default_exercises
+        return self._default_exercises()
     
     def _save_exercise_database(self, exercises=None):
         if exercises is None:
@@ -202,23 +344,66 @@ class WorkoutAppGUI:
         exercise_dict = {}
         for ex_id, ex in exercises.items():
             exercise_dict[ex_id] = ex.to_dict()
-            
-        with open("exercise_database.json", "w") as f:
-            json.dump(exercise_dict, f, indent=4)
+        
+        # Called from the loader thread, so callers watch the writer
+        self.writer.save_json("exercise_database.json", exercise_dict)
     
     def _load_workout_history(self):
+        # WORKOUT_STORAGE=sqlite switches to the indexed SQLite history store
         try:
-            if os.path.exists("workout_history.json"):
-                with open("workout_history.json", "r") as f:
-                    return json.load(f)
+            return workout_storage.open_history_store(os.environ.get("WORKOUT_STORAGE", "json"),
+                                                      writer=self.writer, recent_limit=HISTORY_WINDOW)
         except Exception as e:
             print(f"Error loading workout history: {e}")
         
-        return {}
+        return workout_storage.JournalHistoryStore("workout_history.ndjson", writer=self.writer)
+    
+    def _save_workout_history(self, workout_id, workout_summary):
+        # Append only the new session instead of rewriting all history
+        self.workout_history.add_workout(workout_id, workout_summary)
+        
+        # Fold the new session into the dashboard figures and personal records
+        # and persist them alongside
+        self.dashboard_stats.record_workout(workout_id, workout_summary)
+        workout_stats.save_aggregate("workout_stats.json", self.dashboard_stats, self.writer)
+        new_records = self.personal_records.record_workout(workout_id, workout_summary)
+        workout_stats.save_aggregate("personal_records.json", self.personal_records, self.writer)
+        self.fatigue.record_workout(workout_id, workout_summary)
+        workout_stats.save_aggregate("fatigue.json", self.fatigue, self.writer)
+        self.set_timing.record_workout(workout_id, workout_summary)
+        workout_stats.save_aggregate("set_timing.json", self.set_timing, self.writer)
+        self._refresh_home_stats()
+        self._validate_workout(self.plan_validator.refresh())
+        
+        # Recalibrate the duration estimate with the new set timings
+        self.duration_estimator.invalidate(exercise["exercise_id"] for exercise in workout_summary["exercises"])
+        self.workout_generator.clear_cache()
+        self.plan_seconds = self.duration_estimator.plan_seconds(self.current_workout)
+        self._update_plan_estimate()
+        self._watch_writer()
+        return new_records
+    
+    def _watch_writer(self):
+        # Poll the writer only while saves are outstanding
+        if self.writer_watch_id is not None:
+            return
+        
+        def check():
+            self.writer_watch_id = None
+            if self.writer.pending:
+                self.save_status_var.set("Saving...")
+                self.writer_watch_id = self.root.after(200, check)
+            elif self.writer.last_error:
+                self.save_status_var.set(f"Save failed: {self.writer.last_error}")
+            else:
+                self.save_status_var.set("All changes saved")
+        
+        check()
     
-    def _save_workout_history(self):
-        with open("workout_history.json", "w") as f:
-            json.dump(self.workout_history, f, indent=4)
+    def _on_close(self):
+        # Flush outstanding saves before the window goes away
+        self.writer.close()
+        self.root.destroy()
     
     def _setup_home_tab(self):
         frame = ttk.Frame(self.tab_home, padding="20")
@@ -238,19 +423,13 @@ class WorkoutAppGUI:
         stats_frame = ttk.LabelFrame(frame, text="Your Stats", padding=10)
         stats_frame.pack(fill="x", pady=20)
         
-        # Calculate stats
-        total_workouts = len(self.workout_history)
-        
-        # Last workout date
-        last_workout_date = "Never"
-        if total_workouts > 0:
-            dates = [workout["date"] for workout in self.workout_history.values()]
-            last_workout_date = max(dates)
-            last_workout_date = datetime.fromisoformat(last_workout_date).strftime("%Y-%m-%d %H:%M")
-        
-        # Display stats
-        ttk.Label(stats_frame, text=f"Total Workouts: {total_workouts}").grid(row=0, column=0, padx=5, pady=5, sticky="w")
-        ttk.Label(stats_frame, text=f"Last Workout: {last_workout_date}").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+        # Stat labels are filled from the running aggregates and refreshed on every save
+        self.home_stat_labels = {}
+        for row, key in enumerate(["total", "last", "week", "month", "volume", "streak"]):
+            label = ttk.Label(stats_frame)
+            label.grid(row=row % 3, column=row // 3, padx=5, pady=5, sticky="w")
+            self.home_stat_labels[key] = label
+        self._refresh_home_stats()
         
         # Quick actions
         actions_frame = ttk.Frame(frame)
@@ -262,6 +441,75 @@ class WorkoutAppGUI:
                   command=lambda: self.tab_control.select(1)).pack(side="left", padx=10)
         ttk.Button(actions_frame, text="Check Workout History", 
                   command=lambda: self.tab_control.select(4)).pack(side="left", padx=10)
+        ttk.Button(actions_frame, text="Training Report", 
+                  command=self._show_training_report).pack(side="left", padx=10)
+    
+    def _refresh_home_stats(self):
+        stats = self.dashboard_stats
+        labels = self.home_stat_labels
+        if stats is None:
+            labels["total"].config(text="Loading workout history...")
+            return
+        
+        # Last workout date
+        last_workout_date = "Never"
+        if stats.last_date:
+            last_workout_date = datetime.fromisoformat(stats.last_date).strftime("%Y-%m-%d %H:%M")
+        
+        labels["total"].config(text=f"Total Workouts: {stats.total_workouts}")
+        labels["last"].config(text=f"Last Workout: {last_workout_date}")
+        labels["week"].config(text=f"This Week: {stats.workouts_this_week()}")
+        labels["month"].config(text=f"This Month: {stats.workouts_this_month()}")
+        labels["volume"].config(text=f"Total Reps: {stats.total_volume}")
+        labels["streak"].config(text=f"Streak: {stats.active_streak()} days (best {stats.longest_streak})")
+    
+    def _show_training_report(self):
+        if not self.data_loaded:
+            messagebox.showinfo("Training Report", "Workout history is still loading.")
+            return
+        
+        try:
+            import workout_analytics
+        except ImportError:
+            messagebox.showinfo("Training Report", "Training reports need NumPy (pip install numpy).")
+            return
+        
+        report_window = tk.Toplevel(self.root)
+        report_window.title("Training Report")
+        report_window.geometry("450x500")
+        
+        report_text = tk.Text(report_window, wrap="word")
+        report_text.pack(expand=True, fill="both", padx=10, pady=10)
+        report_text.insert(tk.END, "Building report...")
+        report_text.config(state="disabled")
+        
+        # Reading the full history can go to disk (and wait for pending
+        # saves), so the table is built on a worker thread and the window
+        # filled in once it is done
+        exercise_masks = {ex_id: ex.muscle_mask for ex_id, ex in self.exercises.items()}
+        result = {}
+        
+        def build():
+            try:
+                table = workout_analytics.SetTable.from_history(self.workout_history.iter_all(), exercise_masks)
+                result["lines"] = workout_analytics.training_report(table)
+            except Exception as e:
+                result["lines"] = [f"Could not build the report: {e}"]
+        
+        def check():
+            if worker.is_alive():
+                self.root.after(LOAD_POLL_MS, check)
+                return
+            if not report_text.winfo_exists():
+                return
+            report_text.config(state="normal")
+            report_text.delete(1.0, tk.END)
+            report_text.insert(tk.END, "\n".join(result["lines"]))
+            report_text.config(state="disabled")
+        
+        worker = threading.Thread(target=build, daemon=True)
+        worker.start()
+        self.root.after(LOAD_POLL_MS, check)
     
     def _setup_exercises_tab(self):
         # Create a frame with a paned window
@@ -281,6 +529,7 @@ class WorkoutAppGUI:
         paned.add(left_frame, weight=1)
         
         ttk.Label(left_frame, text="Filter by Muscle Group", font=("Arial", 12, "bold")).pack(anchor="w", pady=(0, 10))
+        ttk.Label(left_frame, text="Ctrl-click to combine groups").pack(anchor="w", pady=(0, 5))
         
         # Create treeview for muscle groups
         self.muscle_tree = ttk.Treeview(left_frame, show="tree")
@@ -299,17 +548,21 @@ class WorkoutAppGUI:
         right_frame = ttk.Frame(paned, padding=10)
         paned.add(right_frame, weight=2)
         
-        # Create exercises treeview
-        columns = ("name", "muscle_groups", "difficulty")
-        self.exercise_tree = ttk.Treeview(right_frame, columns=columns, show="headings")
-        self.exercise_tree.heading("name", text="Exercise Name")
-        self.exercise_tree.heading("muscle_groups", text="Muscle Groups")
-        self.exercise_tree.heading("difficulty", text="Difficulty")
-        
-        self.exercise_tree.column("name", width=150)
-        self.exercise_tree.column("muscle_groups", width=150)
-        self.exercise_tree.column("difficulty", width=100)
-        
+        # Search box; the list refreshes once typing pauses
+        search_frame = ttk.Frame(right_frame)
+        search_frame.pack(fill="x", pady=(0, 10))
+        ttk.Label(search_frame, text="Search:").pack(side="left", padx=(0, 5))
+        self.exercise_search_var = tk.StringVar()
+        search_entry = ttk.Entry(search_frame, textvariable=self.exercise_search_var)
+        search_entry.pack(side="left", expand=True, fill="x")
+        search_entry.bind("<KeyRelease>", lambda e: self._debounce("exercise_search", self._populate_exercise_list))
+        self.exercise_muscle_filter = "all"
+        
+        # Create exercises treeview; only the rows on screen exist as items
+        columns = [("name", "Exercise Name", 150), ("muscle_groups", "Muscle Groups", 150),
+                   ("difficulty", "Difficulty", 100)]
+        self.exercise_tree = workout_views.VirtualTreeview(
+            right_frame, columns, self._exercise_row_values, on_select=self._show_exercise_details)
         self.exercise_tree.pack(expand=True, fill="both", pady=(0, 10))
         
         # Exercise detail frame
@@ -325,36 +578,67 @@ class WorkoutAppGUI:
         self.detail_text.pack(expand=True, fill="both", padx=5, pady=5)
         detail_scroll.config(command=self.detail_text.yview)
         
-        # Bind selection event to show details
-        self.exercise_tree.bind("<<TreeviewSelect>>", self._show_exercise_details)
-        
         # Populate the exercise list initially with all exercises
         self._populate_exercise_list()
     
+    def _debounce(self, key, callback, delay=SEARCH_DEBOUNCE_MS):
+        # Run callback once `delay` ms have passed without another call for `key`
+        pending = self.debounce_ids.pop(key, None)
+        if pending is not None:
+            self.root.after_cancel(pending)
+        
+        def run():
+            del self.debounce_ids[key]
+            callback()
+        
+        self.debounce_ids[key] = self.root.after(delay, run)
+    
     def _filter_exercises(self, event):
-        selected_item = self.muscle_tree.focus()
-        if selected_item:
-            self._populate_exercise_list(selected_item)
-    
-    def _populate_exercise_list(self, muscle_filter="all"):
-        # Clear current items
-        for item in self.exercise_tree.get_children():
-            self.exercise_tree.delete(item)
-        
-        # Add exercises to the tree
-        for ex_id, exercise in self.exercises.items():
-            muscle_groups_str = ", ".join([mg.value for mg in exercise.muscle_groups])
-            
-            # Apply filter
-            if muscle_filter == "all" or muscle_filter in [mg.value for mg in exercise.muscle_groups]:
-                self.exercise_tree.insert("", "end", ex_id, values=(exercise.name, muscle_groups_str, exercise.difficulty_level))
+        # One group, or a tuple of groups an exercise must train together
+        selected = [item for item in self.muscle_tree.selection() if item != "all"]
+        if not selected:
+            self.exercise_muscle_filter = "all"
+        elif len(selected) == 1:
+            self.exercise_muscle_filter = selected[0]
+        else:
+            self.exercise_muscle_filter = tuple(selected)
+        self._populate_exercise_list()
+    
+    def _matching_exercise_ids(self, muscle_filter, search_text):
+        # Muscle-group postings narrowed (and ranked) by the search text
+        if isinstance(muscle_filter, tuple):
+            mask = 0
+            for group in muscle_filter:
+                mask |= MuscleGroup(group).bit
+            matching_ids = self.exercise_index.query(all_of=mask)
+            if not search_text.strip():
+                return matching_ids
+            candidates = set(matching_ids)
+        elif muscle_filter is None:
+            candidates = None
+        else:
+            candidates = self.exercise_index.by_muscle_group.get(muscle_filter, set())
+        if search_text.strip():
+            return self.exercise_index.search(search_text, candidates=candidates)
+        # A live view of the index's name order; nothing is copied
+        return self.exercise_index.ordered(muscle_filter)
     
-    def _show_exercise_details(self, event):
-        selected_id = self.exercise_tree.focus()
+    def _exercise_row_values(self, ex_id):
+        exercise = self.exercises[ex_id]
+        return (exercise.name, self.exercise_index.muscle_labels[ex_id], exercise.difficulty_level)
+    
+    def _populate_exercise_list(self):
+        # Point the tree at the matching ids; it fills only its visible rows
+        muscle_filter = self.exercise_muscle_filter
+        self.exercise_tree.set_ids(self._matching_exercise_ids(None if muscle_filter == "all" else muscle_filter,
+                                                               self.exercise_search_var.get()))
+    
+    def _show_exercise_details(self, selected_id):
         if selected_id in self.exercises:
             exercise = self.exercises[selected_id]
             
             # Clear current text
+            self.detail_text.config(state="normal")
             self.detail_text.delete(1.0, tk.END)
             
             # Add exercise details
@@ -370,6 +654,20 @@ class WorkoutAppGUI:
                 
             self.detail_text.insert(tk.END, f"Recommended Rest: {exercise.recommended_rest} seconds")
             
+            # Personal records, straight from the records index
+            records = self.personal_records.get(exercise.id)
+            if records:
+                self.detail_text.insert(tk.END, "\n\nPersonal Records:\n")
+                for line in workout_stats.format_personal_records(records):
+                    self.detail_text.insert(tk.END, f"• {line}\n")
+            
+            # Set and rest timing percentiles from recorded sessions
+            histograms = self.set_timing.get(exercise.id)
+            if histograms:
+                self.detail_text.insert(tk.END, "\nSet Timing:\n")
+                for line in workout_stats.format_set_timing(histograms):
+                    self.detail_text.insert(tk.END, f"• {line}\n")
+            
             # Make text read-only
             self.detail_text.config(state="disabled")
     
@@ -401,16 +699,19 @@ class WorkoutAppGUI:
         filter_combo.pack(side="left", expand=True, fill="x")
         filter_combo.bind("<<ComboboxSelected>>", lambda e: self._filter_exercise_selection())
         
-        # Exercise selection listbox with scrollbar
-        select_frame = ttk.Frame(left_frame)
-        select_frame.pack(expand=True, fill="both")
-        
-        scrollbar = ttk.Scrollbar(select_frame)
-        scrollbar.pack(side="right", fill="y")
-        
-        self.exercise_listbox = tk.Listbox(select_frame, yscrollcommand=scrollbar.set, selectmode="single")
+        # Search box; the list refreshes once typing pauses
+        search_frame = ttk.Frame(left_frame)
+        search_frame.pack(fill="x", pady=(0, 10))
+        ttk.Label(search_frame, text="Search:").pack(side="left", padx=(0, 5))
+        self.selection_search_var = tk.StringVar()
+        search_entry = ttk.Entry(search_frame, textvariable=self.selection_search_var)
+        search_entry.pack(side="left", expand=True, fill="x")
+        search_entry.bind("<KeyRelease>", lambda e: self._debounce("selection_search", self._filter_exercise_selection))
+        
+        # Exercise selection list with scrollbar; only visible lines are filled
+        self.exercise_listbox = workout_views.VirtualListbox(
+            left_frame, lambda exercise_id: self.exercises[exercise_id].name)
         self.exercise_listbox.pack(expand=True, fill="both")
-        scrollbar.config(command=self.exercise_listbox.yview)
         
         # Populate the exercise list
         self._filter_exercise_selection()
@@ -450,6 +751,11 @@ class WorkoutAppGUI:
         self.workout_listbox.pack(expand=True, fill="both")
         scrollbar2.config(command=self.workout_listbox.yview)
         
+        # Estimated duration, kept as a running total as items come and go
+        self.plan_estimate_var = tk.StringVar()
+        ttk.Label(right_frame, textvariable=self.plan_estimate_var).pack(anchor="w", pady=(0, 10))
+        self._update_plan_estimate()
+        
         # Buttons for workout management
         btn_frame = ttk.Frame(right_frame)
         btn_frame.pack(fill="x")
@@ -458,6 +764,8 @@ class WorkoutAppGUI:
                   command=self._remove_from_workout).pack(side="left", padx=(0, 5))
         ttk.Button(btn_frame, text="Clear All", 
                   command=self._clear_workout).pack(side="left", padx=(0, 5))
+        ttk.Button(btn_frame, text="Generate...", 
+                  command=self._show_generate_dialog).pack(side="left", padx=(0, 5))
         ttk.Button(btn_frame, text="Start Workout", 
                   command=self._start_workout).pack(side="right")
         
@@ -471,37 +779,27 @@ class WorkoutAppGUI:
         self.validation_text.config(state="disabled")
     
     def _filter_exercise_selection(self):
-        # Clear current items
-        self.exercise_listbox.delete(0, tk.END)
-        
         # Get selected filter
         filter_value = self.filter_var.get()
         
-        # Sort exercises by name
-        sorted_exercises = sorted(self.exercises.values(), key=lambda x: x.name)
-        
-        # Add exercises to the listbox
-        for exercise in sorted_exercises:
-            if filter_value == "All" or filter_value in [mg.value for mg in exercise.muscle_groups]:
-                self.exercise_listbox.insert(tk.END, f"{exercise.name}")
-                # Store the exercise ID as an item attribute
-                self.exercise_listbox.itemconfig(tk.END, {"exercise_id": exercise.id})
+        # Exercises come back from the index already sorted by name (or by
+        # relevance when searching)
+        self.exercise_listbox.set_ids(self._matching_exercise_ids(
+            None if filter_value == "All" else filter_value, self.selection_search_var.get()))
     
     def _add_to_workout(self):
-        selected_index = self.exercise_listbox.curselection()
-        if not selected_index:
+        exercise_id = self.exercise_listbox.selected_id
+        if exercise_id is None:
             messagebox.showinfo("Selection Required", "Please select an exercise first.")
             return
         
         # Get the selected exercise
-        selected_index = selected_index[0]
-        exercise_id = self.exercise_listbox.itemcget(selected_index, "exercise_id")
         exercise = self.exercises[exercise_id]
         
         # Add to current workout
-        sets = self.sets_var.get()
-        reps = self.reps_var.get()
-        
+        self._append_workout_item(exercise, self.sets_var.get(), self.reps_var.get())
+    
+    def _append_workout_item(self, exercise, sets, reps):
         workout_item = {
             "exercise": exercise,
             "sets": sets,
@@ -509,12 +807,80 @@ class WorkoutAppGUI:
         }
         
         self.current_workout.append(workout_item)
+        self.plan_seconds += self.duration_estimator.exercise_seconds(exercise, sets, reps)
+        self._update_plan_estimate()
         
         # Update the workout listbox
         self.workout_listbox.insert(tk.END, f"{exercise.name} - {sets} sets x {reps} reps")
         
         # Validate the workout
-        self._validate_workout()
+        self._validate_workout(self.plan_validator.add(exercise))
+    
+    def _show_generate_dialog(self):
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Generate Workout")
+        dialog.transient(self.root)
+        
+        frame = ttk.Frame(dialog, padding=10)
+        frame.pack(expand=True, fill="both")
+        
+        groups_frame = ttk.LabelFrame(frame, text="Target Muscle Groups", padding=5)
+        groups_frame.pack(fill="x", pady=(0, 10))
+        group_vars = {}
+        for mg in MuscleGroup:
+            group_vars[mg.value] = tk.BooleanVar(value=True)
+            ttk.Checkbutton(groups_frame, text=mg.value, variable=group_vars[mg.value]).pack(anchor="w")
+        
+        # Exercises needing no equipment are always allowed
+        equipment_frame = ttk.LabelFrame(frame, text="Available Equipment", padding=5)
+        equipment_frame.pack(fill="x", pady=(0, 10))
+        equipment_vars = {}
+        for equipment in sorted(e for e in self.exercise_index.by_equipment if e):
+            equipment_vars[equipment] = tk.BooleanVar(value=True)
+            ttk.Checkbutton(equipment_frame, text=equipment, variable=equipment_vars[equipment]).pack(anchor="w")
+        
+        options_frame = ttk.Frame(frame)
+        options_frame.pack(fill="x", pady=(0, 10))
+        ttk.Label(options_frame, text="Hardest difficulty:").grid(row=0, column=0, sticky="w", pady=2)
+        difficulty_var = tk.StringVar(value="Any")
+        ttk.Combobox(options_frame, textvariable=difficulty_var, state="readonly", width=12,
+                     values=["Any"] + list(workout_planner.DIFFICULTY_LEVELS)).grid(row=0, column=1, sticky="w")
+        ttk.Label(options_frame, text="Whole workout (minutes):").grid(row=1, column=0, sticky="w", pady=2)
+        minutes_var = tk.IntVar(value=30)
+        ttk.Spinbox(options_frame, from_=5, to=180, increment=5, textvariable=minutes_var,
+                    width=5).grid(row=1, column=1, sticky="w")
+        
+        def generate():
+            targets = [group for group, var in group_vars.items() if var.get()]
+            if not targets:
+                messagebox.showinfo("Generate Workout", "Select at least one muscle group.", parent=dialog)
+                return
+            try:
+                minutes = minutes_var.get()
+                sets = self.sets_var.get()
+                reps = self.reps_var.get()
+                if minutes <= 0 or sets <= 0 or reps <= 0:
+                    raise ValueError
+            except (tk.TclError, ValueError):
+                messagebox.showinfo("Generate Workout", "Please enter valid numbers.", parent=dialog)
+                return
+            
+            difficulty = difficulty_var.get()
+            plan, _ = self.workout_generator.generate(
+                targets,
+                [equipment for equipment, var in equipment_vars.items() if var.get()],
+                None if difficulty == "Any" else difficulty,
+                minutes * 60, sets, reps, current=self.current_workout)
+            if not plan:
+                messagebox.showinfo("Generate Workout", "No exercises fit those constraints.", parent=dialog)
+                return
+            
+            # Sets and reps come from the spinboxes beside "Add to Workout"
+            for item in plan:
+                self._append_workout_item(item["exercise"], item["sets"], item["reps"])
+            dialog.destroy()
+        
+        ttk.Button(frame, text="Generate", command=generate).pack(fill="x")
     
     def _remove_from_workout(self):
         selected_index = self.workout_listbox.curselection()
@@ -524,58 +890,76 @@ class WorkoutAppGUI:
         
         # Remove from current workout
         selected_index = selected_index[0]
-        self.current_workout.pop(selected_index)
+        workout_item = self.current_workout.pop(selected_index)
         self.workout_listbox.delete(selected_index)
+        self.plan_seconds -= self.duration_estimator.exercise_seconds(
+            workout_item["exercise"], workout_item["sets"], workout_item["reps"])
+        self._update_plan_estimate()
         
         # Validate the updated workout
-        self._validate_workout()
+        self._validate_workout(self.plan_validator.remove(workout_item["exercise"]))
     
     def _clear_workout(self):
         self.current_workout = []
         self.workout_listbox.delete(0, tk.END)
+        self.plan_seconds = 0
+        self._update_plan_estimate()
         
         # Update validation
-        self.validation_text.config(state="normal")
-        self.validation_text.delete(1.0, tk.END)
-        self.validation_text.insert(tk.END, "Add exercises to create a workout...")
-        self.validation_text.config(state="disabled")
+        self.plan_validator.clear()
+        self._validate_workout({})
     
-    def _validate_workout(self):
+    def _update_plan_estimate(self):
         if not self.current_workout:
-            self.validation_text.config(state="normal")
+            self.plan_estimate_var.set("Estimated duration: -")
+        else:
+            self.plan_estimate_var.set(
+                f"Estimated duration: {self.plan_seconds // 60} mins {self.plan_seconds % 60} secs")
+    
+    def _validate_workout(self, changes):
+        # Patch only the validation lines in `changes` (from the plan
+        # validator). Each line carries a tag named after its key; new
+        # warnings go before the "warnings_end" mark and new counts before
+        # "counts_end".
+        self.validation_text.config(state="normal")
+        
+        if not self.plan_validator:
+            self.validation_text.mark_unset("warnings_end", "counts_end")
             self.validation_text.delete(1.0, tk.END)
             self.validation_text.insert(tk.END, "Add exercises to create a workout...")
             self.validation_text.config(state="disabled")
             return
         
-        muscle_group_count = {}
-        warnings = []
-        
-        for workout_item in self.current_workout:
-            exercise = workout_item["exercise"]
+        if "warnings_end" not in self.validation_text.mark_names():
+            # First exercise of a plan: lay out the sections, then fill every
+            # line. Both marks keep the default right gravity, so lines
+            # inserted at a mark land in order before it; the header goes in
+            # at 1.0 and pushes "warnings_end" past itself, keeping warnings
+            # between the header and the distribution heading.
+            self.validation_text.delete(1.0, tk.END)
+            self.validation_text.insert(tk.END, "\nMuscle Group Distribution:\n")
+            self.validation_text.mark_set("warnings_end", "1.0")
+            self.validation_text.mark_set("counts_end", "end-1c")
+            changes = dict(self.plan_validator.lines())
+        
+        for key, text in changes.items():
+            tag = "line:" + ":".join(str(part) for part in key)
+            ranges = self.validation_text.tag_ranges(tag)
+            if ranges:
+                self.validation_text.delete(*ranges)
+            if text is None:
+                continue
             
-            for muscle in exercise.muscle_groups:
-                muscle_group_count[muscle.value] = muscle_group_count.get(muscle.value, 0) + 1
-                
-                if muscle_group_count[muscle.value] > 2:
-                    warnings.append(f"Warning: {muscle.value} is being trained {muscle_group_count[muscle.value]} times. "
-                                  f"This might lead to excessive fatigue.")
-        
-        # Update validation text
-        self.validation_text.config(state="normal")
-        self.validation_text.delete(1.0, tk.END)
-        
-        if warnings:
-            self.validation_text.insert(tk.END, "WARNINGS:\n")
-            for warning in warnings:
-                self.validation_text.insert(tk.END, f"• {warning}\n")
-        else:
-            self.validation_text.insert(tk.END, "This workout has a good balance of muscle groups.\n")
-        
-        # Display muscle group distribution
-        self.validation_text.insert(tk.END, "\nMuscle Group Distribution:\n")
-        for muscle, count in muscle_group_count.items():
-            self.validation_text.insert(tk.END, f"• {muscle}: {count} exercises\n")
+            line = text + "\n" if key[0] == "header" else f"• {text}\n"
+            if ranges:
+                index = ranges[0]
+            elif key[0] == "header":
+                index = "1.0"
+            elif key[0] == "count":
+                index = "counts_end"
+            else:
+                index = "warnings_end"
+            self.validation_text.insert(index, line, (tag,))
             
         self.validation_text.config(state="disabled")
     
@@ -588,8 +972,10 @@ class WorkoutAppGUI:
         self.current_exercise_index = 0
         self.current_set = 1
         
-        # Enable and switch to the active workout tab
+        # Enable and switch to the active workout tab, building it first so
+        # the update below has widgets to fill
         self.tab_control.tab(3, state="normal")
+        self._build_tab(str(self.tab_active_workout))
         self.tab_control.select(3)
         
         # Update active workout UI
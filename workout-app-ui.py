@@ -1,10 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import time
-import json
-import os
 from datetime import datetime
 
+import workout_storage
+import workout_timer
+import workout_views
+
 class WorkoutApp(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -12,18 +14,34 @@ class WorkoutApp(tk.Tk):
         self.title("Workout Timer App")
         self.geometry("600x500")
         self.configure(bg="#f0f0f0")
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Data storage
         self.data_file = "workout_history.json"
+        self.journal_file = "timer_history.ndjson"
+        self.interval_journal_file = "interval_history.ndjson"
         self.workout_history = self.load_workout_history()
+        # Date-sorted index for the history window, built when first opened
+        self.history_index = None
+        self.history_view = None
+        
+        # Saves run on a background thread so the window never blocks on disk
+        self.writer = workout_storage.BackgroundWriter()
+        self.writer_watch_id = None
         
         # Variables
         self.selected_body_parts = []
         self.workout_time = tk.IntVar(value=60)  # Default 60 seconds
         self.timer_running = False
         self.timer_paused = False
-        self.remaining_time = 0
+        self.countdown = None
         self.current_workout = None
+        self.timer_mode = tk.StringVar(value="Countdown")
+        self.interval_plan = tk.StringVar()
+        self.logged_phases = 0
+        
+        # Every countdown runs from this one scheduler on the Tk event loop
+        self.scheduler = workout_timer.TimerScheduler(self)
         
         # Create interface
         self.create_widgets()
@@ -70,10 +88,26 @@ class WorkoutApp(tk.Tk):
             ttk.Button(presets_frame, text=f"{preset}s", 
                       command=lambda t=preset: self.workout_time.set(t)).grid(row=0, column=i, padx=3)
         
+        # Interval mode: the plan entry takes a mode-specific format,
+        # pre-filled with an example when the mode changes
+        ttk.Label(timer_frame, text="Mode:").grid(row=2, column=0, padx=5, pady=5)
+        mode_combo = ttk.Combobox(timer_frame, textvariable=self.timer_mode, state="readonly", width=12,
+                                  values=["Countdown"] + list(workout_timer.INTERVAL_MODES))
+        mode_combo.grid(row=2, column=1, padx=5, pady=5, sticky="w")
+        mode_combo.bind("<<ComboboxSelected>>",
+                        lambda e: self.interval_plan.set(workout_timer.INTERVAL_MODES.get(self.timer_mode.get(), "")))
+        
+        ttk.Label(timer_frame, text="Intervals:").grid(row=3, column=0, padx=5, pady=5)
+        ttk.Entry(timer_frame, textvariable=self.interval_plan, width=25).grid(
+            row=3, column=1, padx=5, pady=5, sticky="w")
+        
         # Timer display
         self.timer_display = ttk.Label(main_frame, text="00:00", font=("Arial", 36))
         self.timer_display.pack(pady=10)
         
+        self.phase_display = ttk.Label(main_frame, text="", font=("Arial", 14))
+        self.phase_display.pack()
+        
         # Control buttons
         controls_frame = ttk.Frame(main_frame)
         controls_frame.pack(pady=10)
@@ -89,6 +123,10 @@ class WorkoutApp(tk.Tk):
         
         # History button
         ttk.Button(main_frame, text="View Workout History", command=self.show_history).pack(pady=10)
+        
+        # Save status
+        self.save_status = ttk.Label(main_frame, text="")
+        self.save_status.pack()
     
     def start_timer(self):
         # Check if at least one body part is selected
@@ -97,52 +135,84 @@ class WorkoutApp(tk.Tk):
             messagebox.showwarning("Warning", "Please select at least one body part.")
             return
         
-        # Get time value
-        try:
-            seconds = self.workout_time.get()
-            if seconds <= 0:
-                raise ValueError
-        except:
-            messagebox.showwarning("Warning", "Please enter a valid time in seconds.")
-            return
-        
         # If timer was paused, resume it
         if self.timer_paused:
             self.timer_paused = False
             self.pause_button.config(text="Pause")
         else:
+            mode = self.timer_mode.get()
+            if mode == "Countdown":
+                # Get time value
+                try:
+                    seconds = self.workout_time.get()
+                    if seconds <= 0:
+                        raise ValueError
+                except:
+                    messagebox.showwarning("Warning", "Please enter a valid time in seconds.")
+                    return
+                timer = workout_timer.CountdownTimer(seconds)
+                on_tick = self.update_timer
+            else:
+                # Compiled once; the display reads phases from the schedule
+                try:
+                    schedule = workout_timer.parse_interval_plan(mode, self.interval_plan.get())
+                except ValueError:
+                    messagebox.showwarning("Warning", f"Please enter valid {mode} intervals, "
+                                           f"e.g. {workout_timer.INTERVAL_MODES[mode]}.")
+                    return
+                timer = workout_timer.IntervalTimer(schedule)
+                on_tick = self.update_interval
+                seconds = round(schedule.total)
+                self.logged_phases = 0
+            
             # Start a new timer
             self.selected_body_parts = selected_parts
-            self.remaining_time = seconds
+            self.countdown = self.scheduler.add(timer, on_tick, self.timer_completion)
             self.current_workout = {
                 "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
                 "body_parts": self.selected_body_parts,
                 "duration": seconds,
                 "completed": False
             }
+            if mode != "Countdown":
+                self.current_workout["mode"] = mode
         
         # Update UI
         self.start_button.config(state=tk.DISABLED)
         self.pause_button.config(state=tk.NORMAL)
         self.reset_button.config(state=tk.NORMAL)
         
-        # Start timer
+        # Start timer; the countdown runs against a monotonic deadline and
+        # calls update_timer as each second passes
         self.timer_running = True
-        self.update_timer()
+        self.countdown.start()
     
-    def update_timer(self):
-        if self.timer_running and not self.timer_paused:
-            if self.remaining_time <= 0:
-                self.timer_completion()
-                return
-            
-            # Update display
-            minutes, seconds = divmod(self.remaining_time, 60)
-            self.timer_display.config(text=f"{minutes:02d}:{seconds:02d}")
-            
-            # Decrement time
-            self.remaining_time -= 1
-            self.after(1000, self.update_timer)
+    def update_timer(self, remaining):
+        self.timer_display.config(text=workout_timer.format_clock(remaining))
+    
+    def update_interval(self, remaining):
+        timer = self.countdown.timer
+        schedule = timer.schedule
+        index, phase_left = timer.phase()
+        self.log_intervals(index)
+        
+        self.timer_display.config(text=workout_timer.format_tenths(phase_left))
+        self.phase_display.config(text=f"{schedule.name} - Round {schedule.rounds[index]}/{schedule.round_count} - "
+                                       f"{schedule.kinds[index].upper()}")
+    
+    def log_intervals(self, upto):
+        # Journal every phase before `upto` that hasn't been logged yet, one
+        # compact record per interval
+        schedule = self.countdown.timer.schedule
+        for index in range(self.logged_phases, upto):
+            self.writer.append(self.interval_journal_file, {
+                "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "plan": schedule.name,
+                "round": schedule.rounds[index],
+                "phase": schedule.kinds[index],
+                "seconds": schedule.phase_seconds(index)
+            })
+        self.logged_phases = max(self.logged_phases, upto)
     
     def pause_timer(self):
         if self.timer_running:
@@ -150,17 +220,21 @@ class WorkoutApp(tk.Tk):
                 # Resume
                 self.timer_paused = False
                 self.pause_button.config(text="Pause")
-                self.update_timer()
+                self.countdown.resume()
             else:
                 # Pause
                 self.timer_paused = True
                 self.pause_button.config(text="Resume")
+                self.countdown.pause()
     
     def reset_timer(self):
         self.timer_running = False
         self.timer_paused = False
-        self.remaining_time = 0
+        if self.countdown is not None:
+            self.countdown.cancel()
+            self.countdown = None
         self.timer_display.config(text="00:00")
+        self.phase_display.config(text="")
         
         # Reset buttons
         self.start_button.config(state=tk.NORMAL)
@@ -171,12 +245,21 @@ class WorkoutApp(tk.Tk):
     def timer_completion(self):
         self.timer_running = False
         self.timer_display.config(text="Done!")
+        self.phase_display.config(text="")
+        
+        # The last interval finishes with the timer
+        if isinstance(self.countdown.timer, workout_timer.IntervalTimer):
+            self.log_intervals(len(self.countdown.timer.schedule))
         
         # Save workout data
         if self.current_workout:
             self.current_workout["completed"] = True
             self.workout_history.append(self.current_workout)
-            self.save_workout_history()
+            self.save_workout_history(self.current_workout)
+            if self.history_index is not None:
+                self.history_index.add(len(self.workout_history) - 1)
+                if self.history_view is not None and self.history_view.frame.winfo_exists():
+                    self.history_view.refresh()
         
         # Show notification
         messagebox.showinfo("Workout Complete", 
@@ -186,17 +269,36 @@ class WorkoutApp(tk.Tk):
         self.reset_timer()
     
     def load_workout_history(self):
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
+        try:
+            return workout_storage.load_workout_list(self.data_file, self.journal_file)
+        except:
+            return []
     
-    def save_workout_history(self):
-        with open(self.data_file, 'w') as f:
-            json.dump(self.workout_history, f)
+    def save_workout_history(self, workout):
+        self.writer.append(self.journal_file, workout)
+        self.watch_writer()
+    
+    def watch_writer(self):
+        # Poll the writer only while saves are outstanding
+        if self.writer_watch_id is not None:
+            return
+        
+        def check():
+            self.writer_watch_id = None
+            if self.writer.pending:
+                self.save_status.config(text="Saving...")
+                self.writer_watch_id = self.after(200, check)
+            elif self.writer.last_error:
+                self.save_status.config(text=f"Save failed: {self.writer.last_error}")
+            else:
+                self.save_status.config(text="Workout saved")
+        
+        check()
+    
+    def on_close(self):
+        # Flush outstanding saves before the window goes away
+        self.writer.close()
+        self.destroy()
     
     def show_history(self):
         # Create a new window
@@ -204,59 +306,33 @@ class WorkoutApp(tk.Tk):
         history_window.title("Workout History")
         history_window.geometry("500x400")
         
-        # Create a scrollable frame
         main_frame = ttk.Frame(history_window)
         main_frame.pack(fill="both", expand=True, padx=10, pady=10)
         
-        # Add a scrollbar
-        canvas = tk.Canvas(main_frame)
-        scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=canvas.yview)
-        scrollable_frame = ttk.Frame(canvas)
-        
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-        
         # History header
-        ttk.Label(scrollable_frame, text="Workout History", font=("Arial", 14, "bold")).grid(
-            row=0, column=0, columnspan=3, pady=10)
-        
-        # Column headers
-        ttk.Label(scrollable_frame, text="Date", font=("Arial", 10, "bold")).grid(
-            row=1, column=0, padx=5, pady=5, sticky="w")
-        ttk.Label(scrollable_frame, text="Body Parts", font=("Arial", 10, "bold")).grid(
-            row=1, column=1, padx=5, pady=5, sticky="w")
-        ttk.Label(scrollable_frame, text="Duration", font=("Arial", 10, "bold")).grid(
-            row=1, column=2, padx=5, pady=5, sticky="w")
+        ttk.Label(main_frame, text="Workout History", font=("Arial", 14, "bold")).pack(pady=10)
         
         # No workout history
         if not self.workout_history:
-            ttk.Label(scrollable_frame, text="No workout history found.").grid(
-                row=2, column=0, columnspan=3, pady=20)
+            ttk.Label(main_frame, text="No workout history found.").pack(pady=20)
             return
         
-        # Show workout history
-        for i, workout in enumerate(reversed(self.workout_history)):
-            row = i + 2  # Offset for headers
-            
-            ttk.Label(scrollable_frame, text=workout["date"]).grid(
-                row=row, column=0, padx=5, pady=3, sticky="w")
-            
-            ttk.Label(scrollable_frame, text=", ".join(workout["body_parts"])).grid(
-                row=row, column=1, padx=5, pady=3, sticky="w")
-            
-            # Format duration
-            minutes, seconds = divmod(workout["duration"], 60)
-            duration_text = f"{minutes}m {seconds}s" if minutes else f"{seconds}s"
-            ttk.Label(scrollable_frame, text=duration_text).grid(
-                row=row, column=2, padx=5, pady=3, sticky="w")
+        # Newest first from the date index; the table only creates rows for
+        # what is on screen and reads each page of workouts as it scrolls
+        if self.history_index is None:
+            self.history_index = workout_storage.WorkoutListIndex(self.workout_history)
+        columns = [("date", "Date", 130), ("body_parts", "Body Parts", 220), ("duration", "Duration", 90)]
+        self.history_view = workout_views.VirtualTreeview(main_frame, columns, self.history_row_values)
+        self.history_view.pack(fill="both", expand=True)
+        self.history_view.set_ids(self.history_index)
+    
+    def history_row_values(self, position):
+        workout = self.workout_history[position]
+        
+        # Format duration
+        minutes, seconds = divmod(workout["duration"], 60)
+        duration_text = f"{minutes}m {seconds}s" if minutes else f"{seconds}s"
+        return (workout["date"], ", ".join(workout["body_parts"]), duration_text)
 
 # Run the application
 if __name__ == "__main__":
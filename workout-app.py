@@ -1,9 +1,19 @@
 import time
-import json
 import os
 from datetime import datetime
 from enum import Enum
 
+import workout_catalog
+import workout_planner
+import workout_stats
+import workout_session
+import workout_storage
+
+# Only the most recent workouts are read at startup; older ones are loaded
+# when the history view pages back to them
+HISTORY_WINDOW = 20
+HISTORY_PAGE_SIZE = 10
+
 class MuscleGroup(str, Enum):
     CHEST = "Chest"
     BACK = "Back"
@@ -12,12 +22,17 @@ class MuscleGroup(str, Enum):
     TRICEPS = "Triceps"
     LEGS = "Legs"
     CORE = "Core"
+    
+    @property
+    def bit(self):
+        return workout_catalog.MUSCLE_GROUP_BITS[self.value]
 
 class Exercise:
     def __init__(self, id, name, muscle_groups, description, equipment_needed=None, difficulty_level="beginner", recommended_rest=60):
         self.id = id
         self.name = name
         self.muscle_groups = muscle_groups
+        self.muscle_mask = workout_catalog.muscle_mask(self.muscle_groups)
         self.description = description
         self.equipment_needed = equipment_needed
         self.difficulty_level = difficulty_level
@@ -26,11 +41,25 @@ class Exercise:
 class WorkoutApp:
     def __init__(self):
         self.exercises = self._load_exercise_database()
+        self.exercise_index = workout_catalog.ExerciseIndex(self.exercises.values())
         self.workout_history = self._load_workout_history()
+        self.dashboard_stats = workout_stats.load_aggregate(
+            "workout_stats.json", self.workout_history, workout_stats.DashboardStats)
+        self.personal_records = workout_stats.load_aggregate(
+            "personal_records.json", self.workout_history, workout_stats.PersonalRecords)
+        self.fatigue = workout_stats.load_aggregate(
+            "fatigue.json", self.workout_history, workout_stats.FatigueModel,
+            exercise_masks={ex_id: ex.muscle_mask for ex_id, ex in self.exercises.items()})
+        self.set_timing = workout_stats.load_aggregate(
+            "set_timing.json", self.workout_history, workout_stats.SetTimingStats,
+            exercise_rest={ex_id: ex.recommended_rest for ex_id, ex in self.exercises.items()})
+        self.duration_estimator = workout_planner.DurationEstimator(self.set_timing)
+        self.workout_generator = workout_planner.WorkoutGenerator(
+            self.exercise_index, self.duration_estimator.exercise_seconds)
         
-    def _load_exercise_database(self):
+    def _default_exercises(self):
         # Default exercise database if file doesn't exist
-        default_exercises = {
+        return {
             "push-up-001": Exercise(
                 "push-up-001",
                 "Push-ups",
@@ -113,56 +142,96 @@ class WorkoutApp:
                 60
             )
         }
-        
+    
+    def _load_exercise_database(self):
         try:
             if os.path.exists("exercise_database.json"):
-                with open("exercise_database.json", "r") as f:
-                    data = json.load(f)
-                    exercises = {}
-                    for key, ex in data.items():
-                        exercises[key] = Exercise(
-                            ex["id"],
-                            ex["name"],
-                            [MuscleGroup(mg) for mg in ex["muscle_groups"]],
-                            ex["description"],
-                            ex["equipment_needed"],
-                            ex["difficulty_level"],
-                            ex["recommended_rest"]
-                        )
-                    return exercises
+                # Served from the compiled cache unless the JSON file has changed
+                records = workout_storage.load_exercise_records("exercise_database.json")
+                exercises = {}
+                for key, ex in records.items():
+                    ex_id, name, muscle_groups, description, equipment_needed, difficulty_level, recommended_rest = ex
+                    exercises[key] = Exercise(
+                        ex_id,
+                        name,
+                        [MuscleGroup(mg) for mg in muscle_groups],
+                        description,
+                        equipment_needed,
+                        difficulty_level,
+                        recommended_rest
+                    )
+                return exercises
         except Exception as e:
             print(f"Error loading exercise database: {e}")
             print("Using default exercise database.")
         
-        return default_exercises
+        return self._default_exercises()
     
     def _load_workout_history(self):
+        # WORKOUT_STORAGE=sqlite switches to the indexed SQLite history store
         try:
-            if os.path.exists("workout_history.json"):
-                with open("workout_history.json", "r") as f:
-                    return json.load(f)
+            return workout_storage.open_history_store(os.environ.get("WORKOUT_STORAGE", "json"),
+                                                      recent_limit=HISTORY_WINDOW)
         except Exception as e:
             print(f"Error loading workout history: {e}")
         
-        return {}
+        return workout_storage.JournalHistoryStore("workout_history.ndjson")
     
-    def _save_workout_history(self):
-        with open("workout_history.json", "w") as f:
-            json.dump(self.workout_history, f, indent=4)
+    def _save_workout_history(self, workout_id, workout_summary):
+        # Append only the new session instead of rewriting all history
+        self.workout_history.add_workout(workout_id, workout_summary)
+        
+        # Keep the dashboard figures and personal records shared with the GUI current
+        self.dashboard_stats.record_workout(workout_id, workout_summary)
+        workout_stats.save_aggregate("workout_stats.json", self.dashboard_stats)
+        new_records = self.personal_records.record_workout(workout_id, workout_summary)
+        workout_stats.save_aggregate("personal_records.json", self.personal_records)
+        self.fatigue.record_workout(workout_id, workout_summary)
+        workout_stats.save_aggregate("fatigue.json", self.fatigue)
+        self.set_timing.record_workout(workout_id, workout_summary)
+        workout_stats.save_aggregate("set_timing.json", self.set_timing)
+        self.duration_estimator.invalidate(exercise["exercise_id"] for exercise in workout_summary["exercises"])
+        self.workout_generator.clear_cache()
+        return new_records
     
     def display_exercises_by_muscle_group(self):
-        muscle_groups = {mg.value: [] for mg in MuscleGroup}
+        print("\n=== EXERCISES BY MUSCLE GROUP ===")
+        for mg in MuscleGroup:
+            exercise_ids = self.exercise_index.query(muscle_group=mg.value)
+            if exercise_ids:
+                print(f"\n{mg.value}:")
+                for i, ex_id in enumerate(exercise_ids, 1):
+                    print(f"  {i}. {self.exercises[ex_id].name}")
         
-        for ex in self.exercises.values():
-            for mg in ex.muscle_groups:
-                muscle_groups[mg.value].append(ex.name)
+        # Exercises (and past workouts) covering several groups at once
+        combined = input("\nMuscle groups to combine, e.g. 'Chest, Triceps' (blank to return): ").strip()
+        if not combined:
+            return
+        try:
+            groups = [MuscleGroup(name.strip().title()) for name in combined.split(",") if name.strip()]
+        except ValueError:
+            print("Unknown muscle group.")
+            return
+        mask = 0
+        for mg in groups:
+            mask |= mg.bit
         
-        print("\n=== EXERCISES BY MUSCLE GROUP ===")
-        for mg, exercises in muscle_groups.items():
-            if exercises:
-                print(f"\n{mg}:")
-                for i, ex in enumerate(exercises, 1):
-                    print(f"  {i}. {ex}")
+        label = " + ".join(workout_catalog.mask_to_groups(mask))
+        exercise_ids = self.exercise_index.query(all_of=mask)
+        print(f"\nExercises training {label}:")
+        if not exercise_ids:
+            print("  None")
+        for i, ex_id in enumerate(exercise_ids, 1):
+            print(f"  {i}. {self.exercises[ex_id].name} "
+                  f"({', '.join(workout_catalog.mask_to_groups(self.exercise_index.masks[ex_id]))})")
+        
+        workouts = self.workout_history.workouts_training(mask)
+        if workouts:
+            last_date = datetime.fromisoformat(workouts[0][1]["date"]).strftime("%Y-%m-%d")
+            count = f"{len(workouts)} workout" + ("s" if len(workouts) != 1 else "")
+            print(f"\nYou have trained {label} together in {count}, most recently on {last_date}.")
+        else:
+            print(f"\nYou have not trained {label} together in one workout yet.")
     
     def list_all_exercises(self):
         print("\n=== ALL EXERCISES ===")
@@ -179,20 +248,40 @@ class WorkoutApp:
         print("\n=== CREATE WORKOUT ===")
         workout_plan = []
         
-        # Convert exercises dictionary to list for easier indexing
+        # Exercises currently on screen; numbers entered refer to this list
         exercise_list = list(self.exercises.values())
+        show_list = True
         
         while True:
-            print("\nAvailable exercises:")
-            for i, ex in enumerate(exercise_list, 1):
-                muscle_groups = ", ".join([mg.value for mg in ex.muscle_groups])
-                print(f"{i}. {ex.name} - {muscle_groups}")
+            if show_list:
+                print("\nAvailable exercises:")
+                for i, ex in enumerate(exercise_list, 1):
+                    print(f"{i}. {ex.name} - {self.exercise_index.muscle_labels[ex.id]}")
+                show_list = False
             
             try:
-                choice = input("\nEnter exercise number (or 'done' to finish): ")
+                choice = input("\nEnter exercise number, part of a name to search, "
+                               "blank to list all, 'auto' to generate a plan (or 'done' to finish): ").strip()
                 if choice.lower() == 'done':
                     break
                 
+                if choice.lower() == 'auto':
+                    generated = self.generate_workout_plan(workout_plan)
+                    workout_plan.extend(generated)
+                    for item in generated:
+                        print(f"Added {item['exercise'].name} - {item['sets']} sets x {item['reps']} reps")
+                    continue
+                
+                if not choice.isdigit():
+                    # Search (or list everything again on a blank entry)
+                    matching_ids = self.exercise_index.search(choice)
+                    if not matching_ids:
+                        print(f"No exercises match '{choice}'.")
+                        continue
+                    exercise_list = [self.exercises[ex_id] for ex_id in matching_ids]
+                    show_list = True
+                    continue
+                
                 ex_index = int(choice) - 1
                 if ex_index < 0 or ex_index >= len(exercise_list):
                     print("Invalid exercise number!")
@@ -218,26 +307,70 @@ class WorkoutApp:
             print("Workout is empty. Returning to main menu.")
             return
         
+        estimate = self.duration_estimator.plan_seconds(workout_plan)
+        print(f"\nWorkout: {len(workout_plan)} exercises, estimated duration "
+              f"{estimate // 60} mins {estimate % 60} secs")
+        
         # Validate workout
         self.validate_workout(workout_plan)
         
         # Start workout
         self.start_workout(workout_plan)
     
+    def generate_workout_plan(self, current_plan=()):
+        # Exercises to add to `current_plan`, keeping the finished plan balanced
+        print("\n=== GENERATE WORKOUT ===")
+        groups = [mg.value for mg in MuscleGroup]
+        print(f"Muscle groups: {', '.join(groups)}")
+        targets = input("Target muscle groups, comma separated (blank for all): ").strip()
+        targets = [t.strip().title() for t in targets.split(",") if t.strip()] or groups
+        unknown = [t for t in targets if t not in groups]
+        if unknown:
+            print(f"Unknown muscle groups: {', '.join(unknown)}")
+            return []
+        
+        equipment = input("Available equipment, comma separated (blank for any, 'none' for bodyweight only): ").strip()
+        if not equipment:
+            equipment = None
+        elif equipment.lower() == "none":
+            equipment = []
+        else:
+            available = {e.lower(): e for e in self.exercise_index.by_equipment if e}
+            equipment = [available.get(e.strip().lower(), e.strip()) for e in equipment.split(",")]
+        
+        difficulty = input(f"Hardest difficulty ({'/'.join(workout_planner.DIFFICULTY_LEVELS)}, blank for any): ").strip().lower()
+        if difficulty and difficulty not in workout_planner.DIFFICULTY_LEVELS:
+            print("Unknown difficulty level.")
+            return []
+        
+        try:
+            minutes = int(input("Time budget for the whole workout in minutes: "))
+            sets = int(input("Sets per exercise (default 3): ") or 3)
+            reps = int(input("Reps per set (default 10): ") or 10)
+            if minutes <= 0 or sets <= 0 or reps <= 0:
+                raise ValueError
+        except ValueError:
+            print("Please enter a valid number.")
+            return []
+        
+        plan, seconds = self.workout_generator.generate(
+            targets, equipment, difficulty or None, minutes * 60, sets, reps, current=current_plan)
+        if not plan:
+            print("No exercises fit those constraints.")
+        else:
+            print(f"Generated {len(plan)} exercises, about {seconds // 60} mins {seconds % 60} secs.")
+        return plan
+    
     def validate_workout(self, workout_plan):
         print("\n=== WORKOUT VALIDATION ===")
-        muscle_group_count = {}
-        warnings = []
-        
+        validator = workout_planner.PlanValidator(self.fatigue)
         for workout_item in workout_plan:
-            exercise = workout_item["exercise"]
-            
-            for muscle in exercise.muscle_groups:
-                muscle_group_count[muscle.value] = muscle_group_count.get(muscle.value, 0) + 1
-                
-                if muscle_group_count[muscle.value] > 2:
-                    warnings.append(f"Warning: {muscle.value} is being trained {muscle_group_count[muscle.value]} times. "
-                                  f"This might lead to excessive fatigue.")
+            validator.add(workout_item["exercise"])
+        
+        # Overload warnings plus what was trained recently, from the running
+        # fatigue model
+        muscle_group_count = validator.counts
+        warnings = validator.warnings()
         
         print("\nMuscle Group Distribution:")
         for muscle, count in muscle_group_count.items():
@@ -254,83 +387,13 @@ class WorkoutApp:
             print("\nThis workout has a good balance of muscle groups.")
             return True
     
-    def start_timer(self, duration):
-        print(f"\nRest timer: {duration} seconds")
-        start_time = time.time()
-        try:
-            while True:
-                elapsed = time.time() - start_time
-                remaining = duration - int(elapsed)
-                
-                if remaining <= 0:
-                    print("\nRest time complete!")
-                    break
-                
-                mins, secs = divmod(remaining, 60)
-                timer_display = f"\rTime remaining: {mins:02d}:{secs:02d}"
-                print(timer_display, end="", flush=True)
-                time.sleep(1)
-        except KeyboardInterrupt:
-            print("\nTimer stopped.")
-            return
-    
     def start_workout(self, workout_plan):
         print("\n=== STARTING WORKOUT ===")
         workout_id = f"workout_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         start_time = time.time()
-        completed_exercises = []
         
-        for workout_item in workout_plan:
-            exercise = workout_item["exercise"]
-            planned_sets = workout_item["sets"]
-            planned_reps = workout_item["reps"]
-            
-            print(f"\n--- {exercise.name} ---")
-            print(f"Target: {planned_sets} sets x {planned_reps} reps")
-            print(f"Description: {exercise.description}")
-            if exercise.equipment_needed:
-                print(f"Equipment needed: {exercise.equipment_needed}")
-            
-            exercise_completion = {
-                "exercise_id": exercise.id,
-                "exercise_name": exercise.name,
-                "planned_sets": planned_sets,
-                "planned_reps": planned_reps,
-                "completed_sets": 0,
-                "actual_reps": [],
-                "difficulty_ratings": []
-            }
-            
-            for current_set in range(1, planned_sets + 1):
-                input(f"\nPress ENTER to start set {current_set}/{planned_sets}...")
-                
-                set_start_time = time.time()
-                input("Performing exercise... Press ENTER when completed.")
-                set_end_time = time.time()
-                
-                try:
-                    actual_reps = int(input(f"How many reps did you complete? (target: {planned_reps}): "))
-                    difficulty = int(input("Rate difficulty (1-5): "))
-                    
-                    # Validate input
-                    if difficulty < 1 or difficulty > 5:
-                        difficulty = 3
-                        print("Invalid difficulty rating, setting to 3.")
-                        
-                except ValueError:
-                    print("Invalid input, using default values.")
-                    actual_reps = planned_reps
-                    difficulty = 3
-                
-                exercise_completion["completed_sets"] += 1
-                exercise_completion["actual_reps"].append(actual_reps)
-                exercise_completion["difficulty_ratings"].append(difficulty)
-                
-                # Rest timer between sets
-                if current_set < planned_sets:
-                    self.start_timer(exercise.recommended_rest)
-            
-            completed_exercises.append(exercise_completion)
+        # Sets, logging and rest countdowns run concurrently on asyncio
+        completed_exercises = workout_session.run_session(workout_plan)
         
         end_time = time.time()
         total_time = int(end_time - start_time)
@@ -352,8 +415,7 @@ class WorkoutApp:
             "average_difficulty": average_difficulty
         }
         
-        self.workout_history[workout_id] = workout_summary
-        self._save_workout_history()
+        new_records = self._save_workout_history(workout_id, workout_summary)
         
         # Display workout summary
         print("\n=== WORKOUT COMPLETED ===")
@@ -366,6 +428,89 @@ class WorkoutApp:
             print(f"  Completed: {exercise['completed_sets']} sets")
             print(f"  Actual reps: {exercise['actual_reps']}")
             print(f"  Difficulty ratings: {exercise['difficulty_ratings']}")
+        
+        if new_records:
+            print("\nNew personal records:")
+            for exercise_name, record in new_records:
+                print(f"  • {exercise_name}: {record}")
+    
+    def view_personal_records(self):
+        print("\n=== PERSONAL RECORDS ===")
+        found = False
+        for ex_id in self.exercise_index.sorted_ids():
+            records = self.personal_records.get(ex_id)
+            if records:
+                found = True
+                print(f"\n{self.exercises[ex_id].name}:")
+                for line in workout_stats.format_personal_records(records):
+                    print(f"  {line}")
+        
+        if not found:
+            print("\nNo personal records yet. Complete a workout to set some!")
+    
+    def view_set_timing(self):
+        print("\n=== SET TIMING ===")
+        found = False
+        for ex_id in self.exercise_index.sorted_ids():
+            histograms = self.set_timing.get(ex_id)
+            if histograms:
+                found = True
+                print(f"\n{self.exercises[ex_id].name} (recommended rest {self.exercises[ex_id].recommended_rest}s):")
+                for line in workout_stats.format_set_timing(histograms):
+                    print(f"  {line}")
+        
+        if not found:
+            print("\nNo set timings recorded yet. Complete a workout to collect some!")
+            return
+        
+        overall = {kind: self.set_timing.combined(kind) for kind in ("set_time", "rest_overrun")}
+        print("\nAll exercises:")
+        for line in workout_stats.format_set_timing(overall):
+            print(f"  {line}")
+    
+    def view_training_report(self):
+        try:
+            import workout_analytics
+        except ImportError:
+            print("\nTraining reports need NumPy (pip install numpy).")
+            return
+        
+        print("\n=== TRAINING REPORT ===")
+        exercise_masks = {ex_id: ex.muscle_mask for ex_id, ex in self.exercises.items()}
+        table = workout_analytics.SetTable.from_history(self.workout_history.iter_all(), exercise_masks)
+        for line in workout_analytics.training_report(table):
+            print(line)
+    
+    def view_exercise_history(self):
+        print("\n=== EXERCISE HISTORY ===")
+        query = input("Exercise name (or part of it): ").strip()
+        matching_ids = self.exercise_index.search(query)
+        if not matching_ids:
+            print(f"No exercises match '{query}'.")
+            return
+        
+        ex_id = matching_ids[0]
+        if len(matching_ids) > 1:
+            for i, match_id in enumerate(matching_ids, 1):
+                print(f"{i}. {self.exercises[match_id].name}")
+            choice = input("Enter exercise number: ").strip()
+            if not choice.isdigit() or not 1 <= int(choice) <= len(matching_ids):
+                print("Invalid exercise number!")
+                return
+            ex_id = matching_ids[int(choice) - 1]
+        
+        sessions = self.workout_history.exercise_history(ex_id)
+        print(f"\n{self.exercises[ex_id].name}:")
+        if not sessions:
+            print("  Not done in any saved workout yet.")
+            return
+        
+        # Every session that included the exercise, newest first
+        for workout_id, date, exercise in sessions:
+            formatted_date = datetime.fromisoformat(date).strftime("%Y-%m-%d %H:%M")
+            reps = ", ".join(str(r) for r in exercise["actual_reps"])
+            print(f"  {formatted_date}: {exercise['completed_sets']}/{exercise['planned_sets']} sets, "
+                  f"reps {reps or '-'} (target {exercise['planned_reps']})")
     
     def view_workout_history(self):
         if not self.workout_history:
@@ -374,27 +519,34 @@ class WorkoutApp:
         
         print("\n=== WORKOUT HISTORY ===")
         
-        # Sort workouts by date (newest first)
-        sorted_workouts = sorted(
-            self.workout_history.items(),
-            key=lambda x: x[1]["date"],
-            reverse=True
-        )
-        
-        for workout_id, workout in sorted_workouts:
-            date_obj = datetime.fromisoformat(workout["date"])
-            formatted_date = date_obj.strftime("%Y-%m-%d %H:%M:%S")
+        # Workouts by date (newest first), one page at a time; older pages
+        # are loaded from disk only when requested
+        offset = 0
+        while True:
+            page = self.workout_history.recent_workouts(limit=HISTORY_PAGE_SIZE, offset=offset)
             
-            print(f"\nWorkout ID: {workout_id}")
-            print(f"Date: {formatted_date}")
-            print(f"Duration: {workout['total_time'] // 60} mins {workout['total_time'] % 60} secs")
-            print(f"Average difficulty: {workout['average_difficulty']:.1f}/5")
+            for workout_id, workout in page:
+                date_obj = datetime.fromisoformat(workout["date"])
+                formatted_date = date_obj.strftime("%Y-%m-%d %H:%M:%S")
+                
+                print(f"\nWorkout ID: {workout_id}")
+                print(f"Date: {formatted_date}")
+                print(f"Duration: {workout['total_time'] // 60} mins {workout['total_time'] % 60} secs")
+                print(f"Average difficulty: {workout['average_difficulty']:.1f}/5")
+                
+                print("\nExercises:")
+                for exercise in workout["exercises"]:
+                    print(f"  • {exercise['exercise_name']}: {exercise['completed_sets']} sets, {sum(exercise['actual_reps'])} total reps")
+                
+                print("-" * 50)
             
-            print("\nExercises:")
-            for exercise in workout["exercises"]:
-                print(f"  • {exercise['exercise_name']}: {exercise['completed_sets']} sets, {sum(exercise['actual_reps'])} total reps")
+            offset += len(page)
+            if len(page) < HISTORY_PAGE_SIZE:
+                break
             
-            print("-" * 50)
+            more = input("\nPress ENTER for older workouts (or 'q' to return): ")
+            if more.lower() == 'q':
+                break
     
     def main_menu(self):
         while True:
@@ -403,9 +555,13 @@ class WorkoutApp:
             print("2. Browse Exercises by Muscle Group")
             print("3. Create and Start Workout")
             print("4. View Workout History")
-            print("5. Exit")
+            print("5. View Personal Records")
+            print("6. Training Report")
+            print("7. Set Timing Report")
+            print("8. Exercise History")
+            print("9. Exit")
             
-            choice = input("\nEnter your choice (1-5): ")
+            choice = input("\nEnter your choice (1-9): ")
             
             if choice == "1":
                 self.list_all_exercises()
@@ -416,6 +572,14 @@ class WorkoutApp:
             elif choice == "4":
                 self.view_workout_history()
             elif choice == "5":
+                self.view_personal_records()
+            elif choice == "6":
+                self.view_training_report()
+            elif choice == "7":
+                self.view_set_timing()
+            elif choice == "8":
+                self.view_exercise_history()
+            elif choice == "9":
                 print("Thank you for using the Workout App. Goodbye!")
                 break
             else:
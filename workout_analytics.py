@@ -0,0 +1,139 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+import workout_catalog
+
+# numpy day numbers count from 1970-01-01, a Thursday; shifting by 3 makes
+# day // 7 land on Monday-based ISO weeks
+_WEEK_OFFSET = 3
+_MUSCLE_GROUPS = list(workout_catalog.MUSCLE_GROUP_BITS.items())
+
+
+class SetTable:
+    # Saved history flattened into columns, one row per completed set:
+    # day number, exercise code, muscle-group mask, reps and difficulty.
+    # Every report below is a handful of whole-array operations.
+    def __init__(self, days, exercise_codes, masks, reps, difficulty, exercise_ids):
+        self.days = days
+        self.exercise_codes = exercise_codes
+        self.masks = masks
+        self.reps = reps
+        self.difficulty = difficulty
+        self.exercise_ids = exercise_ids
+
+    def __len__(self):
+        return len(self.reps)
+
+    @classmethod
+    def from_history(cls, workouts, exercise_masks=None):
+        # `workouts` yields (workout_id, workout); `exercise_masks` fills in
+        # masks for entries saved before they were recorded
+        exercise_masks = exercise_masks or {}
+        codes = {}
+        days, exercise_codes, masks, reps, difficulty = [], [], [], [], []
+        for _, workout in workouts:
+            day = date.fromisoformat(workout["date"][:10]).toordinal()
+            for exercise in workout["exercises"]:
+                exercise_id = exercise["exercise_id"]
+                code = codes.setdefault(exercise_id, len(codes))
+                mask = exercise.get("muscle_mask") or exercise_masks.get(exercise_id, 0)
+                count = len(exercise["actual_reps"])
+                days.extend([day] * count)
+                exercise_codes.extend([code] * count)
+                masks.extend([mask] * count)
+                reps.extend(exercise["actual_reps"])
+                difficulty.extend(exercise["difficulty_ratings"][:count])
+                difficulty.extend([0] * (count - len(exercise["difficulty_ratings"])))
+
+        # date.toordinal() counts from 0001-01-01; rebase onto the numpy epoch
+        epoch = date(1970, 1, 1).toordinal()
+        return cls(
+            np.array(days, dtype=np.int32) - epoch,
+            np.array(exercise_codes, dtype=np.int32),
+            np.array(masks, dtype=np.int64),
+            np.array(reps, dtype=np.int32),
+            np.array(difficulty, dtype=np.int8),
+            list(codes)
+        )
+
+    def _weeks(self):
+        return (self.days + _WEEK_OFFSET) // 7
+
+    def _week_start(self, week):
+        return date(1970, 1, 1) + timedelta(days=int(week) * 7 - _WEEK_OFFSET)
+
+    def weekly_volume(self):
+        # [(week start date, total reps)] for every week from first to last
+        if not len(self):
+            return []
+        weeks = self._weeks()
+        first = weeks.min()
+        totals = np.bincount(weeks - first, weights=self.reps)
+        return [(self._week_start(first + i), int(total)) for i, total in enumerate(totals)]
+
+    def muscle_group_load(self, since_day=None):
+        # {muscle group: total reps} over sets that trained the group
+        selected = slice(None) if since_day is None else self.days >= since_day
+        masks = self.masks[selected]
+        reps = self.reps[selected]
+        bits = np.array([bit for _, bit in _MUSCLE_GROUPS], dtype=np.int64)
+        trained = (masks[:, None] & bits[None, :]) != 0
+        loads = (trained * reps[:, None]).sum(axis=0)
+        return {name: int(load) for (name, _), load in zip(_MUSCLE_GROUPS, loads)}
+
+    def weekly_difficulty(self):
+        # [(week start date, mean rating)] for weeks that have rated sets
+        rated = self.difficulty > 0
+        if not rated.any():
+            return []
+        weeks = self._weeks()[rated]
+        first = weeks.min()
+        sums = np.bincount(weeks - first, weights=self.difficulty[rated])
+        counts = np.bincount(weeks - first)
+        present = np.nonzero(counts)[0]
+        return [(self._week_start(first + i), float(sums[i] / counts[i])) for i in present]
+
+    def exercise_volume(self):
+        # {exercise_id: total reps}
+        totals = np.bincount(self.exercise_codes, weights=self.reps, minlength=len(self.exercise_ids))
+        return {exercise_id: int(total) for exercise_id, total in zip(self.exercise_ids, totals)}
+
+
+def moving_average(values, window):
+    # Trailing mean over `window` points; shorter than `values` by window - 1
+    values = np.asarray(values, dtype=np.float64)
+    if window <= 0 or len(values) < window:
+        return np.array([], dtype=np.float64)
+    cumulative = np.cumsum(np.insert(values, 0, 0.0))
+    return (cumulative[window:] - cumulative[:-window]) / window
+
+
+def training_report(table, weeks=8, today=None):
+    # Plain-text summary used by both front ends
+    if not len(table):
+        return ["No sets recorded yet."]
+
+    lines = []
+    weekly = table.weekly_volume()[-weeks:]
+    smoothed = moving_average([total for _, total in table.weekly_volume()], 4)
+    lines.append(f"Weekly volume (last {len(weekly)} weeks):")
+    for week_start, total in weekly:
+        lines.append(f"  {week_start:%Y-%m-%d}: {total} reps")
+    if len(smoothed):
+        lines.append(f"  4-week moving average: {smoothed[-1]:.0f} reps/week")
+
+    today = today or date.today()
+    since = (today - timedelta(days=28)).toordinal() - date(1970, 1, 1).toordinal()
+    lines.append("")
+    lines.append("Muscle group load (last 4 weeks):")
+    for name, load in table.muscle_group_load(since_day=since).items():
+        lines.append(f"  {name}: {load} reps")
+
+    difficulty = table.weekly_difficulty()[-weeks:]
+    if difficulty:
+        lines.append("")
+        lines.append("Average difficulty by week:")
+        for week_start, mean in difficulty:
+            lines.append(f"  {week_start:%Y-%m-%d}: {mean:.1f}/5")
+    return lines
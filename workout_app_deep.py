@@ -1,7 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import time
-import threading
+import workout_timer
 
 class WorkoutApp:
     def __init__(self, root):
@@ -21,7 +20,10 @@ class WorkoutApp:
         # Timer variables
         self.timer_running = False
         self.seconds_left = 0
-        self.timer_thread = None
+        self.countdown = None
+        
+        # All timers tick from one scheduler on the Tk event loop; no threads
+        self.scheduler = workout_timer.TimerScheduler(self.root)
         
         # Create UI
         self.create_widgets()
@@ -96,14 +98,16 @@ class WorkoutApp:
         self.log_text.see(tk.END)
         self.log_text.config(state=tk.DISABLED)
         
-        # Start timer thread
-        self.timer_thread = threading.Thread(target=self.run_timer)
-        self.timer_thread.start()
+        # Start the countdown; it ticks on each second of a monotonic deadline
+        self.countdown = self.scheduler.start(
+            workout_timer.CountdownTimer(seconds), self.update_timer, self.timer_complete)
     
     def stop_timer(self):
+        # Takes effect immediately; there is no worker thread to wait for
         self.timer_running = False
-        if self.timer_thread and self.timer_thread.is_alive():
-            self.timer_thread.join()
+        if self.countdown is not None:
+            self.countdown.cancel()
+            self.countdown = None
         
         exercise = self.exercise_var.get()
         self.log_text.config(state=tk.NORMAL)
@@ -114,22 +118,13 @@ class WorkoutApp:
         self.start_button.config(state=tk.NORMAL)
         self.stop_button.config(state=tk.DISABLED)
     
-    def run_timer(self):
-        while self.seconds_left > 0 and self.timer_running:
-            mins, secs = divmod(self.seconds_left, 60)
-            timer_text = f"{mins:02d}:{secs:02d}"
-            
-            # Update GUI from main thread
-            self.root.after(0, lambda: self.timer_label.config(text=timer_text))
-            
-            time.sleep(1)
-            self.seconds_left -= 1
-        
-        if self.seconds_left <= 0 and self.timer_running:
-            self.root.after(0, self.timer_complete)
+    def update_timer(self, remaining):
+        self.seconds_left = remaining
+        self.timer_label.config(text=workout_timer.format_clock(remaining))
     
     def timer_complete(self):
         self.timer_running = False
+        self.countdown = None
         self.timer_label.config(text="00:00")
         self.start_button.config(state=tk.NORMAL)
         self.stop_button.config(state=tk.DISABLED)
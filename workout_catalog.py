@@ -0,0 +1,335 @@
+import re
+from bisect import bisect_left, insort
+from collections.abc import Sequence
+
+# Bit assigned to each muscle group. Masks are persisted in saved history, so
+# existing bits must never change; new groups take the next free bit.
+MUSCLE_GROUP_BITS = {
+    "Chest": 1 << 0,
+    "Back": 1 << 1,
+    "Shoulders": 1 << 2,
+    "Biceps": 1 << 3,
+    "Triceps": 1 << 4,
+    "Legs": 1 << 5,
+    "Core": 1 << 6,
+}
+
+
+def muscle_mask(muscle_groups):
+    # OR of the bits for the given MuscleGroup members (or their string values)
+    mask = 0
+    for mg in muscle_groups:
+        mask |= MUSCLE_GROUP_BITS[getattr(mg, "value", mg)]
+    return mask
+
+
+def mask_to_groups(mask):
+    return [name for name, bit in MUSCLE_GROUP_BITS.items() if mask & bit]
+
+
+def normalize_text(text):
+    # Lowercase words separated by single spaces; punctuation splits words
+    return " ".join(re.findall(r"[a-z0-9]+", (text or "").lower()))
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class NameOrderView(Sequence):
+    # Read-only, live sequence of exercise ids over a sorted (name, id)
+    # list. Slicing copies only the requested ids, so a list widget can
+    # page through a large filter result without materialising it, and
+    # finding an id's position is a binary search on its sort key.
+    def __init__(self, order, sort_keys):
+        self._order = order
+        self._sort_keys = sort_keys
+
+    def __len__(self):
+        return len(self._order)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [exercise_id for _, exercise_id in self._order[position]]
+        return self._order[position][1]
+
+    def index(self, exercise_id):
+        key = self._sort_keys.get(exercise_id)
+        if key is not None:
+            position = bisect_left(self._order, key)
+            if position < len(self._order) and self._order[position] == key:
+                return position
+        raise ValueError(f"{exercise_id!r} is not in the view")
+
+
+class ExerciseIndex:
+    # Inverted indexes over the exercise catalog. Each muscle group, piece of
+    # equipment and difficulty level has a posting set of exercise ids, so a
+    # filter is a set intersection instead of a scan of every exercise, and a
+    # (name, id) list kept in sorted order gives name ordering without
+    # re-sorting the catalog. Adding or removing an exercise only touches its
+    # own postings.
+    #
+    # Search uses trigram postings over names for substring matches and
+    # sorted vocabularies (names only, and every field) for word-prefix
+    # matches, so a query only touches the postings of its own words.
+    def __init__(self, exercises=()):
+        self.exercises = {}
+        self.by_muscle_group = {}
+        self.by_equipment = {}
+        self.by_difficulty = {}
+        self.muscle_labels = {}
+        self.masks = {}
+        self._name_order = []
+        self._group_order = {}
+        self._sort_keys = {}
+        self._grams = {}
+        self._name_words = {}
+        self._name_vocabulary = []
+        self._words = {}
+        self._vocabulary = []
+        self._search_text = {}
+
+        # Bulk build: fill the postings first, then sort the ordered lists once
+        for exercise in exercises:
+            if exercise.id in self.exercises:
+                self._unindex(exercise.id)
+            self._index(exercise)
+        self._name_order = sorted(self._sort_keys.values())
+        for group, ids in self.by_muscle_group.items():
+            self._group_order[group] = sorted(self._sort_keys[exercise_id] for exercise_id in ids)
+        self._name_vocabulary = sorted(self._name_words)
+        self._vocabulary = sorted(self._words)
+
+    def __len__(self):
+        return len(self.exercises)
+
+    def __contains__(self, exercise_id):
+        return exercise_id in self.exercises
+
+    def add(self, exercise):
+        if exercise.id in self.exercises:
+            self.remove(exercise.id)
+
+        name_words, words = self._index(exercise)
+        insort(self._name_order, self._sort_keys[exercise.id])
+        for group in {mg.value for mg in exercise.muscle_groups}:
+            insort(self._group_order.setdefault(group, []), self._sort_keys[exercise.id])
+        for word in name_words:
+            insort(self._name_vocabulary, word)
+        for word in words:
+            insort(self._vocabulary, word)
+
+    def remove(self, exercise_id):
+        if exercise_id not in self.exercises:
+            return
+
+        exercise = self.exercises[exercise_id]
+        name_words, words = self._unindex(exercise_id)
+        del self._name_order[bisect_left(self._name_order, (exercise.name, exercise_id))]
+        for group in {mg.value for mg in exercise.muscle_groups}:
+            order = self._group_order[group]
+            del order[bisect_left(order, (exercise.name, exercise_id))]
+        for word in name_words:
+            del self._name_vocabulary[bisect_left(self._name_vocabulary, word)]
+        for word in words:
+            del self._vocabulary[bisect_left(self._vocabulary, word)]
+
+    def _index(self, exercise):
+        # Add the exercise to every posting; returns the words new to the
+        # name vocabulary and to the full vocabulary
+        self.exercises[exercise.id] = exercise
+        for mg in exercise.muscle_groups:
+            self.by_muscle_group.setdefault(mg.value, set()).add(exercise.id)
+        self.by_equipment.setdefault(exercise.equipment_needed, set()).add(exercise.id)
+        self.by_difficulty.setdefault(exercise.difficulty_level, set()).add(exercise.id)
+        self.muscle_labels[exercise.id] = ", ".join(mg.value for mg in exercise.muscle_groups)
+        self.masks[exercise.id] = exercise.muscle_mask
+        self._sort_keys[exercise.id] = (exercise.name, exercise.id)
+
+        name = normalize_text(exercise.name)
+        equipment = normalize_text(exercise.equipment_needed)
+        description = normalize_text(exercise.description)
+        self._search_text[exercise.id] = (name, equipment, description)
+        for gram in trigrams(name):
+            self._grams.setdefault(gram, set()).add(exercise.id)
+        new_name_words = self._add_words(self._name_words, set(name.split()), exercise.id)
+        new_words = self._add_words(self._words, set(f"{name} {equipment} {description}".split()), exercise.id)
+        return new_name_words, new_words
+
+    def _unindex(self, exercise_id):
+        # Inverse of _index; returns the words that left each vocabulary
+        exercise = self.exercises.pop(exercise_id)
+        for mg in exercise.muscle_groups:
+            self._discard(self.by_muscle_group, mg.value, exercise_id)
+        self._discard(self.by_equipment, exercise.equipment_needed, exercise_id)
+        self._discard(self.by_difficulty, exercise.difficulty_level, exercise_id)
+        del self.muscle_labels[exercise_id]
+        del self.masks[exercise_id]
+        del self._sort_keys[exercise_id]
+
+        name, equipment, description = self._search_text.pop(exercise_id)
+        for gram in trigrams(name):
+            self._discard(self._grams, gram, exercise_id)
+        removed_name_words = self._remove_words(self._name_words, set(name.split()), exercise_id)
+        removed_words = self._remove_words(self._words, set(f"{name} {equipment} {description}".split()), exercise_id)
+        return removed_name_words, removed_words
+
+    def _add_words(self, postings, words, exercise_id):
+        new_words = []
+        for word in words:
+            if word not in postings:
+                postings[word] = set()
+                new_words.append(word)
+            postings[word].add(exercise_id)
+        return new_words
+
+    def _remove_words(self, postings, words, exercise_id):
+        removed_words = []
+        for word in words:
+            self._discard(postings, word, exercise_id)
+            if word not in postings:
+                removed_words.append(word)
+        return removed_words
+
+    def _discard(self, postings, key, exercise_id):
+        ids = postings.get(key)
+        if ids is not None:
+            ids.discard(exercise_id)
+            if not ids:
+                del postings[key]
+
+    def sorted_ids(self):
+        return [exercise_id for _, exercise_id in self._name_order]
+
+    def ordered(self, muscle_group=None):
+        # Live name-ordered view of every exercise, or of one muscle group's;
+        # O(1) to obtain whatever the catalog size
+        if muscle_group is None:
+            return NameOrderView(self._name_order, self._sort_keys)
+        return NameOrderView(self._group_order.setdefault(muscle_group, []), self._sort_keys)
+
+    def _in_name_order(self, ids, limit=None):
+        # Walking the name order is cheaper than sorting when the set is
+        # dense, or when only the first `limit` ids are wanted from a set
+        # large enough that they turn up early in the walk
+        total = len(self._name_order)
+        if len(ids) * 8 > total or (limit is not None and limit * total < len(ids) * len(ids)):
+            ordered = []
+            for _, exercise_id in self._name_order:
+                if exercise_id in ids:
+                    ordered.append(exercise_id)
+                    if limit is not None and len(ordered) >= limit:
+                        break
+            return ordered
+        return sorted(ids, key=self._sort_keys.__getitem__)[:limit]
+
+    def query(self, muscle_group=None, equipment=None, difficulty=None, all_of=0):
+        # Exercise ids matching every given filter, in name order. None means
+        # "don't filter"; use the string "None" to ask for no-equipment
+        # exercises. `all_of` is a muscle-group mask: the exercise must train
+        # every group in it.
+        postings = []
+        if muscle_group is not None:
+            postings.append(self.by_muscle_group.get(muscle_group, set()))
+        if equipment is not None:
+            postings.append(self.by_equipment.get(None if equipment == "None" else equipment, set()))
+        if difficulty is not None:
+            postings.append(self.by_difficulty.get(difficulty, set()))
+
+        if not postings:
+            if not all_of:
+                return self.sorted_ids()
+            masks = self.masks
+            return [exercise_id for _, exercise_id in self._name_order if masks[exercise_id] & all_of == all_of]
+
+        postings.sort(key=len)
+        matches = postings[0].intersection(*postings[1:])
+        if all_of:
+            masks = self.masks
+            matches = {exercise_id for exercise_id in matches if masks[exercise_id] & all_of == all_of}
+        return self._in_name_order(matches)
+
+    def _prefix_matches(self, postings, vocabulary, prefix):
+        matches = set()
+        for word in vocabulary[bisect_left(vocabulary, prefix):]:
+            if not word.startswith(prefix):
+                break
+            matches |= postings[word]
+        return matches
+
+    def _match_tiers(self, word):
+        # Matches for one query word, best tier first: a name word starts
+        # with it, it occurs inside the name, in the equipment, or it starts
+        # any word of the description
+        name_prefix = self._prefix_matches(self._name_words, self._name_vocabulary, word)
+
+        name_substring = set()
+        if len(word) >= 3:
+            postings = sorted((self._grams.get(gram, set()) for gram in trigrams(word)), key=len)
+            for exercise_id in postings[0].intersection(*postings[1:]) - name_prefix:
+                if word in self._search_text[exercise_id][0]:
+                    name_substring.add(exercise_id)
+
+        equipment = set()
+        for value, ids in self.by_equipment.items():
+            if word in normalize_text(value):
+                equipment |= ids
+
+        anywhere = self._prefix_matches(self._words, self._vocabulary, word)
+        return [name_prefix, name_substring, equipment, anywhere]
+
+    def search(self, text, limit=None, candidates=None):
+        # Ranked exercise ids whose name, description or equipment match
+        # every word of `text`; better-tier matches rank first, ties in name
+        # order. `candidates` restricts the result to a set of ids (e.g. a
+        # filter result).
+        words = set(normalize_text(text).split())
+        if not words:
+            ids = set(self.exercises) if candidates is None else candidates
+            return self._in_name_order(ids, limit)
+
+        matches = None
+        word_tiers = []
+        for word in words:
+            tiers = self._match_tiers(word)
+            word_matches = set().union(*tiers)
+            matches = word_matches if matches is None else matches & word_matches
+            if candidates is not None:
+                matches &= candidates
+            if not matches:
+                return []
+            word_tiers.append(tiers)
+
+        if len(word_tiers) == 1:
+            # Single word: the tiers themselves are the ranking buckets
+            buckets = []
+            seen = set()
+            for tier in word_tiers[0]:
+                buckets.append((tier & matches) - seen)
+                seen |= tier
+        else:
+            # Score only the ids that hit a better-than-baseline tier;
+            # everything else in `matches` shares the lowest score
+            weights = (3, 2, 1)
+            scores = {}
+            for tiers in word_tiers:
+                seen = set()
+                for weight, tier in zip(weights, tiers):
+                    for exercise_id in (tier & matches) - seen:
+                        scores[exercise_id] = scores.get(exercise_id, 0) + weight
+                    seen |= tier
+
+            by_score = {}
+            for exercise_id, score in scores.items():
+                by_score.setdefault(score, set()).add(exercise_id)
+            buckets = [by_score[score] for score in sorted(by_score, reverse=True)]
+            buckets.append(matches - scores.keys())
+
+        ranked = []
+        for bucket in buckets:
+            remaining = None if limit is None else limit - len(ranked)
+            ranked.extend(self._in_name_order(bucket, remaining))
+            if limit is not None and len(ranked) >= limit:
+                break
+        return ranked
@@ -0,0 +1,503 @@
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import workout_catalog
+import workout_storage
+
+DIFFICULTY_LEVELS = ("beginner", "intermediate", "advanced")
+
+# Rough time under tension per rep, for plan duration estimates
+SECONDS_PER_REP = 3
+
+
+class PlanValidator:
+    # Running validation of a workout plan. Per-muscle-group exercise counts
+    # are updated by deltas as exercises are added and removed, and every
+    # output line is keyed by (kind, muscle group, ...), so a change reports
+    # just the lines it touched instead of revalidating the whole plan.
+    #
+    # Line kinds: "header" (the summary line), "overload" and "fatigue"
+    # (warnings) and "count" (the muscle group distribution).
+    MAX_PER_GROUP = 2
+
+    def __init__(self, fatigue=None, today=None):
+        self.fatigue = fatigue
+        self.today = today
+        self.counts = {}
+        self.items = 0
+        self._lines = {}
+        self._group_keys = {}
+        self._fatigue_warnings = {}
+
+    def __len__(self):
+        return self.items
+
+    def add(self, exercise):
+        # Returns {line key: new text, or None if the line went away}
+        return self.add_groups(exercise.muscle_groups)
+
+    def remove(self, exercise):
+        return self.remove_groups(exercise.muscle_groups)
+
+    def add_groups(self, muscle_groups):
+        # Same as add() for an exercise given only by its muscle groups
+        # (MuscleGroup members or their string values)
+        self.items += 1
+        return self._apply(muscle_groups, 1)
+
+    def remove_groups(self, muscle_groups):
+        self.items -= 1
+        return self._apply(muscle_groups, -1)
+
+    def clear(self):
+        self.counts = {}
+        self.items = 0
+        self._lines = {}
+        self._group_keys = {}
+
+    def refresh(self):
+        # Recompute the fatigue warnings, e.g. after a workout was saved
+        self._fatigue_warnings = {}
+        changes = {}
+        for group in list(self.counts):
+            self._update_group(group, changes)
+        self._update_header(changes)
+        return changes
+
+    def _apply(self, muscle_groups, delta):
+        changes = {}
+        for mg in muscle_groups:
+            group = getattr(mg, "value", mg)
+            count = self.counts.get(group, 0) + delta
+            if count > 0:
+                self.counts[group] = count
+            else:
+                self.counts.pop(group, None)
+            self._update_group(group, changes)
+        self._update_header(changes)
+        return changes
+
+    def _update_group(self, group, changes):
+        lines = self._group_lines(group)
+        for key in self._group_keys.get(group, set()) - lines.keys():
+            self._set_line(key, None, changes)
+        for key, text in lines.items():
+            self._set_line(key, text, changes)
+        if lines:
+            self._group_keys[group] = set(lines)
+        else:
+            self._group_keys.pop(group, None)
+
+    def _group_lines(self, group):
+        count = self.counts.get(group)
+        if count is None:
+            return {}
+
+        lines = {}
+        if count > self.MAX_PER_GROUP:
+            lines[("overload", group)] = (f"Warning: {group} is being trained {count} times. "
+                                          f"This might lead to excessive fatigue.")
+        for i, warning in enumerate(self._fatigue_for(group)):
+            lines[("fatigue", group, i)] = warning
+        lines[("count", group)] = f"{group}: {count} exercises"
+        return lines
+
+    def _fatigue_for(self, group):
+        # Depends only on saved history, so it is computed once per group
+        if self.fatigue is None:
+            return []
+        if group not in self._fatigue_warnings:
+            self._fatigue_warnings[group] = self.fatigue.warnings([group], self.today)
+        return self._fatigue_warnings[group]
+
+    def _update_header(self, changes):
+        if not self.items:
+            self._set_line(("header",), None, changes)
+        elif self.warnings():
+            self._set_line(("header",), "WARNINGS:", changes)
+        else:
+            self._set_line(("header",), "This workout has a good balance of muscle groups.", changes)
+
+    def _set_line(self, key, text, changes):
+        if self._lines.get(key) == text:
+            return
+        if text is None:
+            del self._lines[key]
+        else:
+            self._lines[key] = text
+        changes[key] = text
+
+    def warnings(self):
+        return [text for key, text in self._lines.items() if key[0] in ("overload", "fatigue")]
+
+    def lines(self):
+        # Every current line as (key, text): header, warnings, then counts
+        header = [(key, text) for key, text in self._lines.items() if key[0] == "header"]
+        warnings = [(key, text) for key, text in self._lines.items() if key[0] in ("overload", "fatigue")]
+        counts = [(key, text) for key, text in self._lines.items() if key[0] == "count"]
+        return header + warnings + counts
+
+
+def estimate_exercise_seconds(exercise, sets, reps):
+    # Working time for every set plus the recommended rest between sets
+    return sets * reps * SECONDS_PER_REP + (sets - 1) * exercise.recommended_rest
+
+
+class DurationEstimator:
+    # Plan durations from each exercise's recommended rest, calibrated by
+    # the median set time and rest overrun recorded in SetTimingStats.
+    # Calibration is looked up once per exercise and kept until
+    # invalidate() (after a workout is saved), so estimating a plan item is
+    # a couple of arithmetic operations.
+    def __init__(self, set_timing=None):
+        self.set_timing = set_timing
+        self._calibration = {}
+
+    def invalidate(self, exercise_ids=None):
+        if exercise_ids is None:
+            self._calibration = {}
+        else:
+            for exercise_id in exercise_ids:
+                self._calibration.pop(exercise_id, None)
+
+    def _calibrate(self, exercise_id):
+        # (median seconds per set or None, median rest overrun in seconds)
+        if exercise_id not in self._calibration:
+            histograms = self.set_timing.get(exercise_id) if self.set_timing is not None else None
+            set_seconds, overrun = None, 0
+            if histograms:
+                if histograms["set_time"].total():
+                    set_seconds = histograms["set_time"].percentile(50)
+                if histograms["rest_overrun"].total():
+                    overrun = histograms["rest_overrun"].percentile(50)
+            self._calibration[exercise_id] = (set_seconds, overrun)
+        return self._calibration[exercise_id]
+
+    def exercise_seconds(self, exercise, sets, reps):
+        set_seconds, overrun = self._calibrate(exercise.id)
+        if set_seconds is None:
+            set_seconds = reps * SECONDS_PER_REP
+        rest = max(0, exercise.recommended_rest + overrun)
+        return round(sets * set_seconds + (sets - 1) * rest)
+
+    def plan_seconds(self, workout_plan):
+        return sum(self.exercise_seconds(item["exercise"], item["sets"], item["reps"]) for item in workout_plan)
+
+
+_GROUP_BITS = list(workout_catalog.MUSCLE_GROUP_BITS.values())
+# Plan states count each muscle group 0, 1 or 2 times, one base-3 digit per
+# group. _FULL[state] is the mask of groups already at the limit.
+_FULL = [sum(bit for i, bit in enumerate(_GROUP_BITS) if state // 3 ** i % 3 == 2)
+         for state in range(3 ** len(_GROUP_BITS))]
+
+
+def _state_step(mask):
+    return sum(3 ** i for i, bit in enumerate(_GROUP_BITS) if mask & bit)
+
+
+class WorkoutGenerator:
+    # Builds balanced plans from the exercise index. A plan's state is how
+    # often it trains each muscle group; the same MAX_PER_GROUP rule as
+    # PlanValidator allows at most 3^7 states, so a 0/1 knapsack over the
+    # candidates keeps, for every reachable state, the quickest set of
+    # exercises that reaches it. The best plan for a time budget is then the
+    # highest-scoring state that fits. Given the plan being built, the
+    # knapsack starts from that plan's state and skips its exercises, so
+    # the finished plan keeps the rule.
+    #
+    # Only the two quickest exercises per muscle-group mask can ever be
+    # used, so the knapsack sees a few hundred candidates at most whatever
+    # the catalog size. Tables are memoized per (targets, equipment,
+    # difficulty, sets, reps, current plan) and answer any time budget.
+    FIRST_HIT = 10
+    SECOND_HIT = 3
+    OFF_TARGET = 1
+
+    def __init__(self, index, estimate=estimate_exercise_seconds):
+        self.index = index
+        self.estimate = estimate
+        self._tables = {}
+
+    def clear_cache(self):
+        # Call after the catalog changes
+        self._tables = {}
+
+    def _candidates(self, target_mask, equipment, max_difficulty):
+        ids = set()
+        for name, bit in workout_catalog.MUSCLE_GROUP_BITS.items():
+            if target_mask & bit:
+                ids |= self.index.by_muscle_group.get(name, set())
+        if max_difficulty is not None:
+            allowed = DIFFICULTY_LEVELS[:DIFFICULTY_LEVELS.index(max_difficulty) + 1]
+            ids &= set().union(*(self.index.by_difficulty.get(level, set()) for level in allowed))
+        if equipment is not None:
+            ids &= set().union(*(self.index.by_equipment.get(item, set()) for item in (None, *equipment)))
+        return ids
+
+    def _table(self, target_mask, equipment, max_difficulty, sets, reps, start=0, exclude=frozenset()):
+        # Knapsack from state `start`, leaving out the ids in `exclude`
+        key = (target_mask, equipment, max_difficulty, sets, reps, start, exclude)
+        if key in self._tables:
+            return self._tables[key]
+
+        # Two quickest exercises per mask (ties broken by name)
+        quickest = {}
+        for exercise_id in self._candidates(target_mask, equipment, max_difficulty) - exclude:
+            exercise = self.index.exercises[exercise_id]
+            entry = (self.estimate(exercise, sets, reps), exercise.name, exercise_id)
+            best = quickest.setdefault(self.index.masks[exercise_id], [])
+            if len(best) < 2:
+                best.append(entry)
+                best.sort()
+            elif entry < best[1]:
+                best[1] = entry
+                best.sort()
+
+        # state -> (seconds, exercise ids)
+        table = {start: (0, ())}
+        for mask, entries in quickest.items():
+            step = _state_step(mask)
+            for seconds, _, exercise_id in entries:
+                for state, (total, chosen) in list(table.items()):
+                    if _FULL[state] & mask:
+                        continue
+                    reached = table.get(state + step)
+                    if reached is None or total + seconds < reached[0]:
+                        table[state + step] = (total + seconds, chosen + (exercise_id,))
+
+        self._tables[key] = table
+        return table
+
+    def _score(self, state, target_mask):
+        score = 0
+        for i, bit in enumerate(_GROUP_BITS):
+            count = state // 3 ** i % 3
+            if target_mask & bit:
+                score += (count >= 1) * self.FIRST_HIT + (count >= 2) * self.SECOND_HIT
+            else:
+                score -= count * self.OFF_TARGET
+        return score
+
+    def generate(self, target_groups, equipment=None, max_difficulty=None, time_budget=None, sets=3, reps=10,
+                 current=()):
+        # Exercises to add to the plan `current` (a list of plan items) as
+        # ([{"exercise", "sets", "reps"}], estimated seconds of the added
+        # exercises). `equipment` lists what is available (None: anything;
+        # exercises needing no equipment always qualify); `time_budget` is
+        # in seconds for the whole plan, current items included. Returns
+        # ([], 0) when nothing fits, or when the current plan already trains
+        # a group more than MAX_PER_GROUP times.
+        if sets < 1 or reps < 1:
+            raise ValueError("Sets and reps must be positive")
+        target_mask = workout_catalog.muscle_mask(target_groups)
+        if equipment is not None:
+            equipment = frozenset(equipment)
+
+        counts = [0] * len(_GROUP_BITS)
+        current_seconds = 0
+        for item in current:
+            exercise = item["exercise"]
+            current_seconds += self.estimate(exercise, item["sets"], item["reps"])
+            for i, bit in enumerate(_GROUP_BITS):
+                if exercise.muscle_mask & bit:
+                    counts[i] += 1
+        if max(counts) > PlanValidator.MAX_PER_GROUP:
+            return [], 0
+        start = sum(count * 3 ** i for i, count in enumerate(counts))
+        exclude = frozenset(item["exercise"].id for item in current)
+        table = self._table(target_mask, equipment, max_difficulty, sets, reps, start, exclude)
+
+        best = None
+        for state, (total, chosen) in table.items():
+            if not chosen:
+                continue
+            if time_budget is not None and current_seconds + total > time_budget:
+                continue
+            rank = (self._score(state, target_mask), -total)
+            if best is None or rank > best[0]:
+                best = (rank, total, chosen)
+
+        if best is None:
+            return [], 0
+        _, total, chosen = best
+        plan = [{"exercise": self.index.exercises[exercise_id], "sets": sets, "reps": reps}
+                for exercise_id in chosen]
+        return plan, total
+
+
+def validate_plan(plan, exercise_groups, fatigue=None):
+    # Headless validation of one plan, with the same rules as the apps.
+    # `plan` is {"id": ..., "exercises": [...]} where each entry is an
+    # exercise id or {"exercise_id": ..., "sets": ..., "reps": ...};
+    # `exercise_groups` maps exercise ids to muscle group names.
+    result = {"plan": None, "valid": False, "muscle_groups": {}, "warnings": [], "errors": []}
+    if isinstance(plan, PlanReadError):
+        result["errors"].append(plan.message)
+        return result
+    if not isinstance(plan, dict) or not isinstance(plan.get("exercises"), list):
+        result["errors"].append("Not a plan: expected an object with an \"exercises\" list")
+        return result
+
+    result["plan"] = plan.get("id")
+    validator = PlanValidator(fatigue)
+    for position, item in enumerate(plan["exercises"], 1):
+        exercise_id = item.get("exercise_id") if isinstance(item, dict) else item
+        groups = exercise_groups.get(exercise_id) if isinstance(exercise_id, str) else None
+        if groups is None:
+            result["errors"].append(f"Exercise {position}: unknown exercise {exercise_id!r}")
+            continue
+        validator.add_groups(groups)
+
+    if not plan["exercises"]:
+        result["errors"].append("Plan has no exercises")
+    result["muscle_groups"] = dict(validator.counts)
+    result["warnings"] = validator.warnings()
+    result["valid"] = not (result["warnings"] or result["errors"])
+    return result
+
+
+class PlanReadError:
+    # Stands in for a plan that could not be read or parsed, so the batch
+    # reports it as an invalid plan instead of stopping
+    def __init__(self, message):
+        self.message = message
+
+
+def iter_plan_files(paths):
+    # Stream (source, plan) pairs out of plan files. NDJSON files (.ndjson,
+    # .jsonl) hold one plan per line and are read line by line; JSON files
+    # hold one plan, a list of plans, or an object mapping plan ids to plans.
+    # Unreadable files and unparseable plans come through as PlanReadError.
+    for path in paths:
+        if os.path.splitext(path)[1] in (".ndjson", ".jsonl"):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for line_number, line in enumerate(f, 1):
+                        if not line.strip():
+                            continue
+                        try:
+                            plan = json.loads(line)
+                        except ValueError as e:
+                            plan = PlanReadError(f"invalid JSON: {e}")
+                        yield f"{path}:{line_number}", plan
+            except (OSError, UnicodeDecodeError) as e:
+                yield path, PlanReadError(f"cannot read: {e}")
+            continue
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except (OSError, UnicodeDecodeError) as e:
+            yield path, PlanReadError(f"cannot read: {e}")
+            continue
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            yield path, PlanReadError(f"invalid JSON: {e}")
+            continue
+        if isinstance(data, list):
+            for i, plan in enumerate(data):
+                yield f"{path}[{i}]", plan
+        elif isinstance(data, dict) and "exercises" not in data:
+            for plan_id, plan in data.items():
+                if isinstance(plan, dict):
+                    plan.setdefault("id", plan_id)
+                yield f"{path}[{plan_id}]", plan
+        else:
+            yield path, data
+
+
+_worker_exercise_groups = None
+
+
+def _init_worker(exercise_groups):
+    # The catalog is sent once per worker process rather than with every batch
+    global _worker_exercise_groups
+    _worker_exercise_groups = exercise_groups
+
+
+def _validate_batch(batch):
+    results = []
+    for source, plan in batch:
+        result = validate_plan(plan, _worker_exercise_groups)
+        result["source"] = source
+        results.append(result)
+    return results
+
+
+def validate_plans(plans, exercise_groups, workers=None, batch_size=256):
+    # Validate (source, plan) pairs in worker processes, yielding results in
+    # input order. Plans are sent in batches, and only a few batches per
+    # worker are in flight at once, so memory stays flat however many plans
+    # the input holds.
+    workers = workers or os.cpu_count() or 1
+    plans = iter(plans)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(exercise_groups,)) as executor:
+        pending = deque()
+        while True:
+            while len(pending) < workers * 2:
+                batch = list(islice(plans, batch_size))
+                if not batch:
+                    break
+                pending.append(executor.submit(_validate_batch, batch))
+            if not pending:
+                break
+            yield from pending.popleft().result()
+
+
+def load_exercise_groups(path="exercise_database.json"):
+    # {exercise id: muscle group names} from the exercise database
+    return {ex[0]: ex[2] for ex in workout_storage.load_exercise_records(path).values()}
+
+
+def _positive_int(text):
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a whole number: {text!r}")
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate workout plan files and write one JSON result per plan.")
+    parser.add_argument("plans", nargs="+", help="plan files (.json, or .ndjson/.jsonl with one plan per line)")
+    parser.add_argument("--exercises", default="exercise_database.json", help="exercise database file")
+    parser.add_argument("--output", "-o", help="write results here instead of standard output")
+    parser.add_argument("--workers", type=_positive_int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--batch-size", type=_positive_int, default=256, help="plans sent to a worker at a time")
+    args = parser.parse_args(argv)
+
+    try:
+        exercise_groups = load_exercise_groups(args.exercises)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error loading exercise database: {e}", file=sys.stderr)
+        return 2
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    checked = invalid = 0
+    try:
+        for result in validate_plans(iter_plan_files(args.plans), exercise_groups, args.workers, args.batch_size):
+            output.write(json.dumps(result) + "\n")
+            checked += 1
+            invalid += not result["valid"]
+    except (OSError, ValueError) as e:
+        print(f"Error reading plans: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"Checked {checked} plans, {invalid} with warnings or errors", file=sys.stderr)
+    return 1 if invalid else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
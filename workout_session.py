@@ -0,0 +1,281 @@
+import asyncio
+import signal
+import sys
+import threading
+import time
+
+import workout_timer
+
+# Seconds added to a rest by "+" without a number
+DEFAULT_REST_EXTENSION = 15
+
+
+class LineReader:
+    # Lines from stdin delivered to the event loop, so prompts can be
+    # awaited while timers keep running. Each line is read through
+    # sys.stdin.readline() on a helper thread, only when a prompt asks for
+    # it: input() calls before and after the session share the same buffer
+    # and nothing is read ahead.
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdin
+        self._pending = None
+
+    def _read(self, loop, future):
+        try:
+            line = self.stream.readline()
+        except (OSError, ValueError):
+            line = ""
+        try:
+            loop.call_soon_threadsafe(self._deliver, future, line)
+        except RuntimeError:
+            # The loop closed while we were waiting for input
+            pass
+
+    @staticmethod
+    def _deliver(future, line):
+        if not future.done():
+            future.set_result(line)
+
+    async def readline(self):
+        # A read interrupted before its line arrives is picked up by the
+        # next call, so no line is lost
+        if self._pending is None:
+            loop = asyncio.get_running_loop()
+            self._pending = loop.create_future()
+            threading.Thread(target=self._read, args=(loop, self._pending), daemon=True).start()
+        line = await asyncio.shield(self._pending)
+        self._pending = None
+        if not line:
+            raise EOFError
+        return line.rstrip("\r\n")
+
+
+class StatusLine:
+    # A terminal line printed just above the prompt being answered and
+    # rewritten in place (saving and restoring the cursor), so updates
+    # never touch what the user is typing. Once the answer is entered the
+    # line is closed and keeps its last text. Off a terminal nothing is
+    # drawn; callers print their own messages.
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.interactive = self.stream.isatty()
+        self._shown = None
+
+    @property
+    def is_open(self):
+        return self._shown is not None
+
+    def open(self, text):
+        # Print the line; the prompt goes on the line below
+        if self.interactive:
+            self.stream.write(f"{text}\n")
+            self.stream.flush()
+            self._shown = text
+
+    def show(self, text):
+        if not self.is_open or text == self._shown:
+            return
+        self.stream.write(f"\x1b7\x1b[1A\r{text}\x1b[K\x1b8")
+        self.stream.flush()
+        self._shown = text
+
+    def close(self):
+        # The prompt below was answered, so the line is no longer one up
+        self._shown = None
+
+
+class RestCountdown:
+    # A rest period counted down by its own task while prompts are awaited.
+    # On a terminal each prompt gets the time left on a status line above
+    # it; otherwise only the end of the rest is announced.
+    def __init__(self, seconds, status):
+        self.timer = workout_timer.CountdownTimer(seconds)
+        self.status = status
+        self.prompt = ""
+        self.started = time.monotonic()
+        self.task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        self.timer.start()
+        while not self.timer.expired:
+            self.redraw()
+            await asyncio.sleep(self.timer.next_tick())
+        if self.status.is_open:
+            self.status.show("Rest time complete!")
+        else:
+            print("\nRest time complete!")
+            if self.prompt:
+                print(self.prompt, end="", flush=True)
+
+    @property
+    def active(self):
+        return not self.task.done()
+
+    def status_text(self):
+        return f"[Rest {workout_timer.format_clock(self.timer.remaining_seconds())}]"
+
+    def redraw(self):
+        if self.active:
+            self.status.show(self.status_text())
+
+    def set_prompt(self, prompt):
+        # Called before awaiting input: opens the status line for a running
+        # countdown, then prints the prompt below it
+        self.prompt = prompt
+        if self.active:
+            self.status.open(self.status_text())
+        print(prompt, end="", flush=True)
+
+    def extend(self, seconds):
+        self.timer.extend(seconds)
+        self.redraw()
+
+    def stop(self):
+        # Seconds actually rested
+        if self.active:
+            self.task.cancel()
+            self.status.show("[Rest stopped]")
+        return round(time.monotonic() - self.started, 1)
+
+
+class SessionEngine:
+    # The CLI workout loop on asyncio. After each set the rest countdown
+    # starts straight away and the reps and difficulty for that set are
+    # logged while it runs. At the "start next set" prompt ENTER ends the
+    # rest early, "+N" extends it by N seconds and "s" (or Ctrl-C) stops
+    # the countdown.
+    def __init__(self, reader=None, status=None):
+        self.reader = reader or LineReader()
+        self.status = status or StatusLine()
+        self.rest = None
+
+    async def ask(self, prompt):
+        if prompt.startswith("\n"):
+            # Keep line breaks between the status line and its prompt out
+            print()
+            prompt = prompt.lstrip("\n")
+        if self.rest is not None:
+            self.rest.set_prompt(prompt)
+        else:
+            print(prompt, end="", flush=True)
+        line = await self.reader.readline()
+        # ENTER moved the cursor down; the countdown shows again above the next prompt
+        self.status.close()
+        return line
+
+    async def ask_int(self, prompt):
+        return int(await self.ask(prompt))
+
+    async def wait_to_start(self, prompt):
+        while True:
+            command = (await self.ask(prompt)).strip().lower()
+            if not command:
+                return
+            if self.rest is not None and command.startswith("+"):
+                try:
+                    seconds = int(command[1:] or DEFAULT_REST_EXTENSION)
+                except ValueError:
+                    print("Use +N to add N seconds of rest.")
+                    continue
+                self.rest.extend(seconds)
+                print(f"Rest extended by {seconds} seconds.")
+            elif self.rest is not None and command == "s":
+                self.rest.stop()
+                print("Rest timer stopped.")
+            else:
+                print("Press ENTER to start, '+N' to add rest or 's' to stop the rest timer.")
+
+    def _on_interrupt(self):
+        # Ctrl-C stops a running rest countdown; otherwise it interrupts
+        # the session as usual
+        if self.rest is None or not self.rest.active:
+            raise KeyboardInterrupt
+        self.rest.stop()
+        print("\nTimer stopped.")
+        print(self.rest.prompt, end="", flush=True)
+
+    async def run_exercise(self, exercise, planned_sets, planned_reps):
+        exercise_completion = {
+            "exercise_id": exercise.id,
+            "exercise_name": exercise.name,
+            "muscle_mask": exercise.muscle_mask,
+            "planned_sets": planned_sets,
+            "planned_reps": planned_reps,
+            "completed_sets": 0,
+            "actual_reps": [],
+            "difficulty_ratings": [],
+            # Seconds spent on each set and resting before each following set
+            "set_times": [],
+            "rest_times": [],
+            "recommended_rest": exercise.recommended_rest
+        }
+
+        for current_set in range(1, planned_sets + 1):
+            await self.wait_to_start(f"\nPress ENTER to start set {current_set}/{planned_sets}... ")
+            if self.rest is not None:
+                exercise_completion["rest_times"].append(self.rest.stop())
+                self.rest = None
+
+            set_start_time = time.monotonic()
+            await self.ask("Performing exercise... Press ENTER when completed.")
+            set_end_time = time.monotonic()
+
+            # Rest between sets starts now; the set is logged during it
+            if current_set < planned_sets:
+                print(f"Rest timer: {exercise.recommended_rest} seconds")
+                self.rest = RestCountdown(exercise.recommended_rest, self.status)
+
+            try:
+                actual_reps = await self.ask_int(f"How many reps did you complete? (target: {planned_reps}): ")
+                difficulty = await self.ask_int("Rate difficulty (1-5): ")
+
+                # Validate input
+                if difficulty < 1 or difficulty > 5:
+                    difficulty = 3
+                    print("Invalid difficulty rating, setting to 3.")
+
+            except ValueError:
+                print("Invalid input, using default values.")
+                actual_reps = planned_reps
+                difficulty = 3
+
+            exercise_completion["completed_sets"] += 1
+            exercise_completion["actual_reps"].append(actual_reps)
+            exercise_completion["difficulty_ratings"].append(difficulty)
+            exercise_completion["set_times"].append(round(set_end_time - set_start_time, 1))
+
+        return exercise_completion
+
+    async def run(self, workout_plan):
+        # Completed exercise records for the plan, in the saved history format
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(signal.SIGINT, self._on_interrupt)
+        except (NotImplementedError, RuntimeError):
+            # No loop signal handlers here (e.g. Windows); Ctrl-C ends the session
+            pass
+        try:
+            completed_exercises = []
+            for workout_item in workout_plan:
+                exercise = workout_item["exercise"]
+                print(f"\n--- {exercise.name} ---")
+                print(f"Target: {workout_item['sets']} sets x {workout_item['reps']} reps")
+                print(f"Description: {exercise.description}")
+                if exercise.equipment_needed:
+                    print(f"Equipment needed: {exercise.equipment_needed}")
+
+                completed_exercises.append(
+                    await self.run_exercise(exercise, workout_item["sets"], workout_item["reps"]))
+            return completed_exercises
+        finally:
+            if self.rest is not None:
+                self.rest.stop()
+                self.rest = None
+            try:
+                loop.remove_signal_handler(signal.SIGINT)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+
+def run_session(workout_plan):
+    return asyncio.run(SessionEngine().run(workout_plan))
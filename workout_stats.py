@@ -0,0 +1,420 @@
+import copy
+import json
+import math
+import os
+from datetime import date, datetime, timedelta
+
+import workout_catalog
+import workout_storage
+
+
+def workout_volume(workout):
+    # Total reps completed across every set of the workout
+    return sum(sum(exercise["actual_reps"]) for exercise in workout["exercises"])
+
+
+class DashboardStats:
+    # Home-tab figures kept as running totals. record_workout folds in one
+    # newly saved workout without looking at the rest of the history, and
+    # source_id remembers which saved workout the figures are current up to.
+    def __init__(self):
+        self.total_workouts = 0
+        self.last_date = None
+        self.weekly_counts = {}
+        self.monthly_counts = {}
+        self.total_volume = 0
+        self.last_day = None
+        self.current_streak = 0
+        self.longest_streak = 0
+        self.source_id = None
+
+    def record_workout(self, workout_id, workout):
+        when = datetime.fromisoformat(workout["date"])
+        year, week, _ = when.isocalendar()
+        week_key = f"{year}-W{week:02d}"
+        month_key = when.strftime("%Y-%m")
+
+        self.total_workouts += 1
+        if self.last_date is None or workout["date"] > self.last_date:
+            self.last_date = workout["date"]
+        self.weekly_counts[week_key] = self.weekly_counts.get(week_key, 0) + 1
+        self.monthly_counts[month_key] = self.monthly_counts.get(month_key, 0) + 1
+        self.total_volume += workout_volume(workout)
+        self._record_day(when.date())
+        self.source_id = workout_id
+
+    def _record_day(self, day):
+        # Streaks count consecutive training days; workouts arrive newest last
+        last_day = date.fromisoformat(self.last_day) if self.last_day else None
+        if last_day is not None and day <= last_day:
+            return
+        if last_day is not None and day - last_day == timedelta(days=1):
+            self.current_streak += 1
+        else:
+            self.current_streak = 1
+        self.longest_streak = max(self.longest_streak, self.current_streak)
+        self.last_day = day.isoformat()
+
+    def active_streak(self, today=None):
+        # The current streak only counts if it reaches today or yesterday
+        if self.last_day is None:
+            return 0
+        today = today or date.today()
+        if today - date.fromisoformat(self.last_day) > timedelta(days=1):
+            return 0
+        return self.current_streak
+
+    def workouts_this_week(self, today=None):
+        year, week, _ = (today or date.today()).isocalendar()
+        return self.weekly_counts.get(f"{year}-W{week:02d}", 0)
+
+    def workouts_this_month(self, today=None):
+        return self.monthly_counts.get((today or date.today()).strftime("%Y-%m"), 0)
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.__dict__.update(data)
+        return stats
+
+    @classmethod
+    def rebuild(cls, workouts, source_id):
+        # Full recount from (workout_id, workout) pairs, oldest first for streaks
+        stats = cls()
+        for workout_id, workout in sorted(workouts, key=lambda x: x[1]["date"]):
+            stats.record_workout(workout_id, workout)
+        stats.source_id = source_id
+        return stats
+
+
+class PersonalRecords:
+    # Best marks per exercise_id, each with the date it was set. Updated from
+    # one saved workout at a time, so a lookup never touches history.
+    def __init__(self):
+        self.records = {}
+        self.source_id = None
+
+    def record_workout(self, workout_id, workout):
+        # Returns (exercise_name, description) for every record the workout broke
+        broken = []
+        for exercise in workout["exercises"]:
+            if not exercise["actual_reps"]:
+                continue
+            current = self.records.setdefault(exercise["exercise_id"], {"exercise_name": exercise["exercise_name"]})
+            current["exercise_name"] = exercise["exercise_name"]
+            ratings = exercise["difficulty_ratings"]
+            candidates = [
+                ("max_set_reps", max(exercise["actual_reps"]), "reps in one set"),
+                ("max_session_reps", sum(exercise["actual_reps"]), "total reps in a session"),
+            ]
+            for key, value, label in candidates:
+                if key not in current or value > current[key]:
+                    if key in current:
+                        broken.append((exercise["exercise_name"], f"{value} {label}"))
+                    current[key] = value
+                    current[f"{key}_date"] = workout["date"]
+            if ratings:
+                # Lowest average rating = the session that felt easiest
+                average = sum(ratings) / len(ratings)
+                if "best_average_difficulty" not in current or average < current["best_average_difficulty"]:
+                    current["best_average_difficulty"] = average
+                    current["best_average_difficulty_date"] = workout["date"]
+        self.source_id = workout_id
+        return broken
+
+    def get(self, exercise_id):
+        return self.records.get(exercise_id)
+
+    def to_dict(self):
+        return {"records": self.records, "source_id": self.source_id}
+
+    @classmethod
+    def from_dict(cls, data):
+        personal_records = cls()
+        personal_records.records = data["records"]
+        personal_records.source_id = data["source_id"]
+        return personal_records
+
+    @classmethod
+    def rebuild(cls, workouts, source_id):
+        personal_records = cls()
+        for workout_id, workout in sorted(workouts, key=lambda x: x[1]["date"]):
+            personal_records.record_workout(workout_id, workout)
+        personal_records.source_id = source_id
+        return personal_records
+
+
+class FatigueModel:
+    # Exponentially weighted acute (about a week) and chronic (about four
+    # weeks) training load per muscle group. Each load is stored as of the
+    # day it was last touched and decayed lazily, so folding in a set or
+    # reading a ratio costs O(1) whatever the history length. A group's
+    # ratio is only reported once it has CHRONIC_DAYS of history; before
+    # that the chronic load has not built up and every ratio looks like a
+    # spike.
+    ACUTE_DAYS = 7
+    CHRONIC_DAYS = 28
+    # Acute:chronic ratio above which a workload spike is flagged
+    SPIKE_RATIO = 1.5
+
+    def __init__(self, exercise_masks=None):
+        self.groups = {}
+        self.source_id = None
+        # Fallback for history saved before muscle masks were recorded
+        self.exercise_masks = exercise_masks or {}
+
+    def record_set(self, day, mask, reps):
+        for name, bit in workout_catalog.MUSCLE_GROUP_BITS.items():
+            if mask & bit:
+                state = self.groups.setdefault(name, {"day": day, "acute": 0.0, "chronic": 0.0,
+                                                      "first_trained": day, "last_trained": day})
+                if day >= state["day"]:
+                    # Decay the stored loads forward to this set's day
+                    elapsed = day - state["day"]
+                    state["acute"] = state["acute"] * math.exp(-elapsed / self.ACUTE_DAYS) + reps
+                    state["chronic"] = state["chronic"] * math.exp(-elapsed / self.CHRONIC_DAYS) + reps
+                    state["day"] = day
+                else:
+                    # An older set contributes its already-decayed share
+                    elapsed = state["day"] - day
+                    state["acute"] += reps * math.exp(-elapsed / self.ACUTE_DAYS)
+                    state["chronic"] += reps * math.exp(-elapsed / self.CHRONIC_DAYS)
+                state["first_trained"] = min(state["first_trained"], day)
+                state["last_trained"] = max(state["last_trained"], day)
+
+    def record_workout(self, workout_id, workout):
+        day = date.fromisoformat(workout["date"][:10]).toordinal()
+        for exercise in workout["exercises"]:
+            mask = exercise.get("muscle_mask") or self.exercise_masks.get(exercise["exercise_id"], 0)
+            for reps in exercise["actual_reps"]:
+                self.record_set(day, mask, reps)
+        self.source_id = workout_id
+
+    def loads(self, group, today=None):
+        # (acute, chronic) load for the group as of today
+        state = self.groups.get(group)
+        if state is None:
+            return 0.0, 0.0
+        today = (today or date.today()).toordinal()
+        elapsed = max(0, today - state["day"])
+        return (state["acute"] * math.exp(-elapsed / self.ACUTE_DAYS),
+                state["chronic"] * math.exp(-elapsed / self.CHRONIC_DAYS))
+
+    def ratio(self, group, today=None):
+        # Acute:chronic workload ratio (both as per-day rates), None until the
+        # group has a full chronic window of history
+        state = self.groups.get(group)
+        if state is None or (today or date.today()).toordinal() - state["first_trained"] < self.CHRONIC_DAYS:
+            return None
+        acute, chronic = self.loads(group, today)
+        if chronic <= 0:
+            return None
+        return (acute / self.ACUTE_DAYS) / (chronic / self.CHRONIC_DAYS)
+
+    def warnings(self, groups, today=None):
+        # Warnings for the muscle groups a planned workout would train
+        today = today or date.today()
+        warnings = []
+        for group in groups:
+            state = self.groups.get(group)
+            if state is None:
+                continue
+            days_since = today.toordinal() - state["last_trained"]
+            if days_since <= 1:
+                when = "today" if days_since <= 0 else "yesterday"
+                warnings.append(f"Warning: {group} was already trained {when}. "
+                                f"Consider giving it 48 hours to recover.")
+            ratio = self.ratio(group, today)
+            if ratio is not None and ratio > self.SPIKE_RATIO:
+                warnings.append(f"Warning: {group} recent workload is {ratio:.1f}x its usual level. "
+                                f"This might lead to excessive fatigue.")
+        return warnings
+
+    def to_dict(self):
+        return {"groups": self.groups, "source_id": self.source_id}
+
+    @classmethod
+    def from_dict(cls, data, exercise_masks=None):
+        model = cls(exercise_masks)
+        if any("first_trained" not in state for state in data["groups"].values()):
+            # Saved before first-trained days were kept; load_aggregate rebuilds it
+            raise ValueError("fatigue model predates first-trained tracking")
+        model.groups = data["groups"]
+        model.source_id = data["source_id"]
+        return model
+
+    @classmethod
+    def rebuild(cls, workouts, source_id, exercise_masks=None):
+        model = cls(exercise_masks)
+        for workout_id, workout in workouts:
+            model.record_workout(workout_id, workout)
+        model.source_id = source_id
+        return model
+
+
+class Histogram:
+    # Fixed-width buckets stored sparsely as {bucket index: count}. Every
+    # histogram of a kind shares the same bucket edges, so merging sessions
+    # (or exercises) is just adding counts.
+    def __init__(self, width=1.0, counts=None):
+        self.width = width
+        self.counts = counts if counts is not None else {}
+
+    def add(self, value, count=1):
+        bucket = math.floor(value / self.width)
+        self.counts[bucket] = self.counts.get(bucket, 0) + count
+
+    def merge(self, other):
+        if other.width != self.width:
+            raise ValueError("Cannot merge histograms with different bucket widths")
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+
+    def total(self):
+        return sum(self.counts.values())
+
+    def percentile(self, p):
+        # Midpoint of the bucket holding the p-th percentile, None when empty
+        total = self.total()
+        if not total:
+            return None
+        rank = p / 100 * total
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return (bucket + 0.5) * self.width
+        return (max(self.counts) + 0.5) * self.width
+
+    def to_dict(self):
+        return {"width": self.width, "counts": [[bucket, count] for bucket, count in self.counts.items()]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["width"], {bucket: count for bucket, count in data["counts"]})
+
+
+class SetTimingStats:
+    # Per-exercise histograms of time spent per set and of rest overrun (actual
+    # rest minus recommended rest), in one-second buckets
+    def __init__(self, exercise_rest=None):
+        self.exercises = {}
+        self.source_id = None
+        # Recommended rest per exercise for history saved before it was recorded
+        self.exercise_rest = exercise_rest or {}
+
+    def _histograms(self, exercise_id):
+        return self.exercises.setdefault(exercise_id, {"set_time": Histogram(), "rest_overrun": Histogram()})
+
+    def record_workout(self, workout_id, workout):
+        for exercise in workout["exercises"]:
+            set_times = exercise.get("set_times", [])
+            rest_times = exercise.get("rest_times", [])
+            if not (set_times or rest_times):
+                continue
+            histograms = self._histograms(exercise["exercise_id"])
+            recommended = exercise.get("recommended_rest", self.exercise_rest.get(exercise["exercise_id"]))
+            for seconds in set_times:
+                histograms["set_time"].add(seconds)
+            if recommended is not None:
+                for seconds in rest_times:
+                    histograms["rest_overrun"].add(seconds - recommended)
+        self.source_id = workout_id
+
+    def get(self, exercise_id):
+        return self.exercises.get(exercise_id)
+
+    def combined(self, kind):
+        # One histogram across every exercise
+        histogram = Histogram()
+        for histograms in self.exercises.values():
+            histogram.merge(histograms[kind])
+        return histogram
+
+    def to_dict(self):
+        return {
+            "exercises": {
+                exercise_id: {kind: histogram.to_dict() for kind, histogram in histograms.items()}
+                for exercise_id, histograms in self.exercises.items()
+            },
+            "source_id": self.source_id
+        }
+
+    @classmethod
+    def from_dict(cls, data, exercise_rest=None):
+        stats = cls(exercise_rest)
+        stats.exercises = {
+            exercise_id: {kind: Histogram.from_dict(histogram) for kind, histogram in histograms.items()}
+            for exercise_id, histograms in data["exercises"].items()
+        }
+        stats.source_id = data["source_id"]
+        return stats
+
+    @classmethod
+    def rebuild(cls, workouts, source_id, exercise_rest=None):
+        stats = cls(exercise_rest)
+        for workout_id, workout in workouts:
+            stats.record_workout(workout_id, workout)
+        stats.source_id = source_id
+        return stats
+
+
+def format_set_timing(histograms):
+    # Display lines for one exercise's entry in SetTimingStats
+    lines = []
+    set_time = histograms["set_time"]
+    if set_time.total():
+        lines.append(f"Set time: p50 {set_time.percentile(50):.0f}s, p90 {set_time.percentile(90):.0f}s, "
+                     f"p99 {set_time.percentile(99):.0f}s ({set_time.total()} sets)")
+    overrun = histograms["rest_overrun"]
+    if overrun.total():
+        lines.append(f"Rest overrun: p50 {overrun.percentile(50):+.0f}s, p90 {overrun.percentile(90):+.0f}s, "
+                     f"p99 {overrun.percentile(99):+.0f}s ({overrun.total()} rests)")
+    return lines
+
+
+def format_personal_records(records):
+    # Display lines for one exercise's entry in PersonalRecords
+    def day(key):
+        return datetime.fromisoformat(records[key]).strftime("%Y-%m-%d")
+
+    lines = []
+    if "max_set_reps" in records:
+        lines.append(f"Most reps in a set: {records['max_set_reps']} ({day('max_set_reps_date')})")
+    if "max_session_reps" in records:
+        lines.append(f"Most reps in a session: {records['max_session_reps']} ({day('max_session_reps_date')})")
+    if "best_average_difficulty" in records:
+        lines.append(f"Easiest session: {records['best_average_difficulty']:.1f}/5 average difficulty "
+                     f"({day('best_average_difficulty_date')})")
+    return lines
+
+
+def load_aggregate(path, history, aggregate_class, **kwargs):
+    # Saved aggregates are trusted while they are current up to the latest
+    # saved workout; otherwise (first run, crash between saves) they are
+    # recounted from history. Extra keyword arguments go to the aggregate.
+    source_id = history.latest_saved_id()
+    try:
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                aggregate = aggregate_class.from_dict(json.load(f), **kwargs)
+            if aggregate.source_id == source_id:
+                return aggregate
+    except Exception as e:
+        print(f"Error loading {path}: {e}")
+
+    aggregate = aggregate_class.rebuild(history.iter_all(), source_id, **kwargs)
+    save_aggregate(path, aggregate)
+    return aggregate
+
+
+def save_aggregate(path, aggregate, writer=None):
+    if writer:
+        # The writer serializes later on its own thread; hand it a copy the
+        # next record_workout can't mutate underneath it
+        writer.save_json(path, copy.deepcopy(aggregate.to_dict()), indent=None)
+    else:
+        workout_storage.write_json_atomic(path, aggregate.to_dict(), indent=None)
@@ -0,0 +1,709 @@
+import json
+import marshal
+import os
+import sqlite3
+import stat
+import tempfile
+import threading
+from bisect import insort
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+
+
+def append_journal_record(path, record):
+    append_journal_records(path, [record])
+
+
+def append_journal_records(path, records):
+    # One compact JSON object per line; O_APPEND keeps concurrent writers from
+    # interleaving and fsync makes the records durable before we return
+    data = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        # Terminate a torn line left by an interrupted append so it can't
+        # swallow this record
+        size = os.fstat(fd).st_size
+        if size and os.pread(fd, 1, size - 1) != b"\n":
+            data = "\n" + data
+        os.write(fd, data.encode("utf-8"))
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_json_atomic(path, data, indent=4):
+    # Write to a temp file in the same directory, then rename over the target
+    # so readers only ever see the old or the new file
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file 0600; keep the target's mode, or give a new
+        # file the usual 0644
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def iter_journal(path):
+    if not os.path.exists(path):
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # A crash mid-append can leave a torn last line; skip it
+                print(f"Skipping unreadable journal record {path}:{line_number}")
+
+
+def iter_journal_reverse(path, block_size=65536):
+    # Newest record first, reading fixed-size blocks back from the end of the
+    # file so the most recent workouts are available without a full scan
+    if not os.path.exists(path):
+        return
+
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        tail = b""
+        while position > 0:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            lines = (f.read(size) + tail).split(b"\n")
+            tail = lines[0]
+            for line in reversed(lines[1:]):
+                record = _parse_journal_line(path, line)
+                if record is not None:
+                    yield record
+        record = _parse_journal_line(path, tail)
+        if record is not None:
+            yield record
+
+
+def _parse_journal_line(path, line):
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        return json.loads(line)
+    except ValueError:
+        print(f"Skipping unreadable journal record in {path}")
+        return None
+
+
+def iter_snapshot(path, chunk_size=65536):
+    # Stream (key, value) pairs out of a top-level JSON object without
+    # holding the whole document in memory
+    if not os.path.exists(path):
+        return
+
+    decoder = json.JSONDecoder()
+    with open(path, "r") as f:
+        buffer = ""
+        position = 0
+        at_eof = False
+
+        def fill():
+            nonlocal buffer, position, at_eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                at_eof = True
+            buffer = buffer[position:] + chunk
+            position = 0
+
+        def next_char():
+            # Skip whitespace and return the next significant character
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position].isspace():
+                    position += 1
+                if position < len(buffer) or at_eof:
+                    return buffer[position] if position < len(buffer) else ""
+                fill()
+
+        def decode():
+            nonlocal position
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, position)
+                except ValueError:
+                    if at_eof:
+                        raise
+                    fill()
+                    continue
+                # A number at the end of the buffer may continue in the next chunk
+                if end == len(buffer) and not at_eof:
+                    fill()
+                    continue
+                position = end
+                return value
+
+        if next_char() != "{":
+            raise ValueError(f"{path} does not contain a JSON object")
+        position += 1
+        while True:
+            char = next_char()
+            if char == ",":
+                position += 1
+                char = next_char()
+            if char == "}":
+                return
+            if char != '"':
+                raise ValueError(f"Malformed JSON object in {path}")
+            key = decode()
+            if next_char() != ":":
+                raise ValueError(f"Malformed JSON object in {path}")
+            position += 1
+            next_char()
+            yield key, decode()
+
+
+def iter_workouts(snapshot_path, journal_path):
+    # Every saved (workout_id, workout) in save order, one at a time
+    yield from iter_snapshot(snapshot_path)
+    for record in iter_journal(journal_path):
+        yield record["id"], record["workout"]
+
+
+def iter_workouts_newest_first(snapshot_path, journal_path):
+    seen = set()
+    for record in iter_journal_reverse(journal_path):
+        if record["id"] not in seen:
+            seen.add(record["id"])
+            yield record["id"], record["workout"]
+
+    # Legacy snapshot entries have no reliable order, so they are only read
+    # (and sorted) once paging reaches past the journal
+    older = [(workout_id, workout) for workout_id, workout in iter_snapshot(snapshot_path)
+             if workout_id not in seen]
+    older.sort(key=lambda x: x[1]["date"], reverse=True)
+    yield from older
+
+
+def load_workout_history(snapshot_path, journal_path):
+    # Workouts saved before the journal existed live in the snapshot file;
+    # everything since is replayed from the journal on top of it
+    return dict(iter_workouts(snapshot_path, journal_path))
+
+
+def workout_muscle_mask(workout):
+    # Muscle groups a saved workout trained; entries saved before masks were
+    # recorded contribute nothing
+    mask = 0
+    for exercise in workout["exercises"]:
+        mask |= exercise.get("muscle_mask", 0)
+    return mask
+
+
+def append_workout(journal_path, workout_id, workout):
+    append_journal_record(journal_path, {"id": workout_id, "workout": workout})
+
+
+def load_workout_list(snapshot_path, journal_path):
+    # List-shaped history used by the timer app
+    history = []
+    if os.path.exists(snapshot_path):
+        with open(snapshot_path, "r") as f:
+            history.extend(json.load(f))
+
+    history.extend(iter_journal(journal_path))
+    return history
+
+
+class WorkoutListIndex(Sequence):
+    # Newest-first positions into the timer app's list-shaped history. The
+    # (date, position) keys are sorted once and kept sorted as workouts are
+    # appended, so a page of rows is a slice of the index rather than a sort
+    # (or a copy) of the whole history.
+    def __init__(self, history):
+        self.history = history
+        # Journal order is date order in practice, so this sort is one pass
+        self._keys = sorted((workout["date"], position) for position, workout in enumerate(history))
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __getitem__(self, index):
+        # Position in the history of the index-th newest workout
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self._keys))
+            return [self._keys[-1 - i][1] for i in range(start, stop, step)]
+        if index < 0:
+            index += len(self._keys)
+        if not 0 <= index < len(self._keys):
+            raise IndexError("workout index out of range")
+        return self._keys[-1 - index][1]
+
+    def add(self, position):
+        # Index a workout appended to the history at `position`
+        insort(self._keys, (self.history[position]["date"], position))
+
+
+class JournalHistoryStore:
+    # Workouts held in memory, new sessions appended to the journal (through
+    # a BackgroundWriter when one is given). When opened with an `older`
+    # iterator only a recent window is loaded; older workouts are pulled
+    # from it on demand as callers page back.
+    def __init__(self, journal_path, workouts=None, writer=None, older=None, snapshot_path=None):
+        self.journal_path = journal_path
+        self.snapshot_path = snapshot_path
+        self.workouts = workouts if workouts is not None else {}
+        self.writer = writer
+        self._older = older
+        self._peeked = None
+        self._ordered = None
+
+    def __len__(self):
+        self._load_older()
+        return len(self.workouts)
+
+    def __bool__(self):
+        if not self.workouts:
+            self._load_older(count=1)
+        return bool(self.workouts)
+
+    def _load_older(self, count=None, since=None):
+        # Pull up to `count` older workouts (or those dated on/after `since`)
+        # from the lazy iterator; with neither, load everything
+        loaded = 0
+        while self._older is not None and (count is None or loaded < count):
+            if self._peeked is None:
+                self._peeked = next(self._older, None)
+                if self._peeked is None:
+                    self._older = None
+                    break
+            workout_id, workout = self._peeked
+            if since is not None and workout["date"] < since:
+                break
+            self._peeked = None
+            if workout_id not in self.workouts:
+                self.workouts[workout_id] = workout
+                self._ordered = None
+                loaded += 1
+
+    @property
+    def fully_loaded(self):
+        return self._older is None
+
+    def add_workout(self, workout_id, workout):
+        self.workouts[workout_id] = workout
+        self._ordered = None
+        if self.writer:
+            self.writer.append(self.journal_path, {"id": workout_id, "workout": workout})
+        else:
+            append_workout(self.journal_path, workout_id, workout)
+
+    def latest_saved_id(self):
+        # Id of the most recently saved workout, read from the journal's tail
+        # (None when everything predates the journal)
+        if self.writer:
+            self.writer.flush()
+        record = next(iter_journal_reverse(self.journal_path), None)
+        return record["id"] if record else None
+
+    def iter_all(self):
+        # Every workout, streamed from disk unless already fully in memory
+        if self.fully_loaded or self.snapshot_path is None:
+            self._load_older()
+            return iter(list(self.workouts.items()))
+        if self.writer:
+            self.writer.flush()
+        return iter(load_workout_history(self.snapshot_path, self.journal_path).items())
+
+    def recent_workouts(self, limit=None, offset=0):
+        # Newest first, as (workout_id, workout) pairs
+        if limit is None:
+            self._load_older()
+        elif offset + limit > len(self.workouts):
+            self._load_older(count=offset + limit - len(self.workouts))
+        if self._ordered is None:
+            self._ordered = sorted(self.workouts.items(), key=lambda x: x[1]["date"], reverse=True)
+        end = None if limit is None else offset + limit
+        return self._ordered[offset:end]
+
+    def exercise_history(self, exercise_id):
+        # (workout_id, date, exercise entry) for every session that included the exercise
+        results = []
+        for workout_id, workout in self.recent_workouts():
+            for exercise in workout["exercises"]:
+                if exercise["exercise_id"] == exercise_id:
+                    results.append((workout_id, workout["date"], exercise))
+        return results
+
+    def workouts_training(self, all_of):
+        # Workouts that covered every muscle group in the mask, newest first
+        return [(workout_id, workout) for workout_id, workout in self.recent_workouts()
+                if workout_muscle_mask(workout) & all_of == all_of]
+
+
+class SqliteHistoryStore:
+    # Normalized history: nothing is materialized up front and listing,
+    # "last workout" and per-exercise queries are answered from indexes
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS workouts (
+            id TEXT PRIMARY KEY,
+            date TEXT NOT NULL,
+            total_time INTEGER NOT NULL,
+            average_difficulty REAL NOT NULL,
+            muscle_mask INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS workout_exercises (
+            id INTEGER PRIMARY KEY,
+            workout_id TEXT NOT NULL REFERENCES workouts(id),
+            position INTEGER NOT NULL,
+            exercise_id TEXT NOT NULL,
+            exercise_name TEXT NOT NULL,
+            muscle_mask INTEGER NOT NULL DEFAULT 0,
+            planned_sets INTEGER NOT NULL,
+            planned_reps INTEGER NOT NULL,
+            completed_sets INTEGER NOT NULL,
+            recommended_rest INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS sets (
+            workout_exercise_id INTEGER NOT NULL REFERENCES workout_exercises(id),
+            set_number INTEGER NOT NULL,
+            reps INTEGER NOT NULL,
+            difficulty INTEGER NOT NULL,
+            seconds REAL,
+            rest_seconds REAL,
+            PRIMARY KEY (workout_exercise_id, set_number)
+        );
+        CREATE INDEX IF NOT EXISTS idx_workouts_date ON workouts(date);
+        CREATE INDEX IF NOT EXISTS idx_workout_exercises_workout ON workout_exercises(workout_id, position);
+        CREATE INDEX IF NOT EXISTS idx_workout_exercises_exercise ON workout_exercises(exercise_id);
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        # Opened on the loader thread, then used from the UI thread and from
+        # workers such as the training report, so every use of the connection
+        # holds the lock
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.RLock()
+        self._add_missing_columns()
+        self.conn.executescript(self.SCHEMA)
+
+    def _add_missing_columns(self):
+        # Databases created before muscle masks were recorded lack the columns
+        for table in ("workouts", "workout_exercises"):
+            columns = [row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")]
+            if columns and "muscle_mask" not in columns:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN muscle_mask INTEGER NOT NULL DEFAULT 0")
+
+        # Likewise for the timing columns, added when set timings were recorded
+        added = {"workout_exercises": ["recommended_rest INTEGER"], "sets": ["seconds REAL", "rest_seconds REAL"]}
+        for table, definitions in added.items():
+            columns = [row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")]
+            for definition in definitions:
+                if columns and definition.split()[0] not in columns:
+                    self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {definition}")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM workouts").fetchone()[0]
+
+    def add_workout(self, workout_id, workout):
+        with self._lock, self.conn:
+            self._insert_workout(workout_id, workout)
+
+    def import_workouts(self, workouts):
+        # Bulk load (workout_id, workout) pairs in a single transaction
+        with self._lock, self.conn:
+            for workout_id, workout in workouts:
+                self._insert_workout(workout_id, workout)
+
+    def _insert_workout(self, workout_id, workout):
+        # Re-saving a workout replaces its exercises and sets as well
+        self.conn.execute(
+            "DELETE FROM sets WHERE workout_exercise_id IN "
+            "(SELECT id FROM workout_exercises WHERE workout_id = ?)",
+            (workout_id,)
+        )
+        self.conn.execute("DELETE FROM workout_exercises WHERE workout_id = ?", (workout_id,))
+        self.conn.execute(
+            "INSERT OR REPLACE INTO workouts (id, date, total_time, average_difficulty, muscle_mask) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (workout_id, workout["date"], workout["total_time"], workout["average_difficulty"],
+             workout_muscle_mask(workout))
+        )
+        for position, exercise in enumerate(workout["exercises"]):
+            cursor = self.conn.execute(
+                "INSERT INTO workout_exercises (workout_id, position, exercise_id, exercise_name, muscle_mask, "
+                "planned_sets, planned_reps, completed_sets, recommended_rest) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (workout_id, position, exercise["exercise_id"], exercise["exercise_name"],
+                 exercise.get("muscle_mask", 0), exercise["planned_sets"], exercise["planned_reps"],
+                 exercise["completed_sets"], exercise.get("recommended_rest"))
+            )
+            # Each set row carries its own time and the rest taken before it
+            # (the first set has none); workouts saved before timings were
+            # recorded leave both NULL
+            set_times = exercise.get("set_times", [])
+            rest_times = [None] + exercise.get("rest_times", [])
+            self.conn.executemany(
+                "INSERT INTO sets (workout_exercise_id, set_number, reps, difficulty, seconds, rest_seconds) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(cursor.lastrowid, set_number, reps, difficulty,
+                  set_times[set_number - 1] if set_number <= len(set_times) else None,
+                  rest_times[set_number - 1] if set_number <= len(rest_times) else None)
+                 for set_number, (reps, difficulty) in enumerate(
+                     zip(exercise["actual_reps"], exercise["difficulty_ratings"]), 1)]
+            )
+
+    def _exercise_entry(self, row):
+        (workout_exercise_id, exercise_id, name, mask, planned_sets, planned_reps, completed_sets,
+         recommended_rest) = row
+        sets = self.conn.execute(
+            "SELECT reps, difficulty, seconds, rest_seconds FROM sets WHERE workout_exercise_id = ? "
+            "ORDER BY set_number",
+            (workout_exercise_id,)
+        ).fetchall()
+        entry = {
+            "exercise_id": exercise_id,
+            "exercise_name": name,
+            "muscle_mask": mask,
+            "planned_sets": planned_sets,
+            "planned_reps": planned_reps,
+            "completed_sets": completed_sets,
+            "actual_reps": [reps for reps, _, _, _ in sets],
+            "difficulty_ratings": [difficulty for _, difficulty, _, _ in sets]
+        }
+        # Timing fields only for workouts that recorded them, as in the journal
+        set_times = [seconds for _, _, seconds, _ in sets if seconds is not None]
+        rest_times = [rest for _, _, _, rest in sets if rest is not None]
+        if set_times or rest_times:
+            entry["set_times"] = set_times
+            entry["rest_times"] = rest_times
+        if recommended_rest is not None:
+            entry["recommended_rest"] = recommended_rest
+        return entry
+
+    def _workout(self, row):
+        workout_id, date, total_time, average_difficulty = row
+        exercises = self.conn.execute(
+            "SELECT id, exercise_id, exercise_name, muscle_mask, planned_sets, planned_reps, completed_sets, "
+            "recommended_rest FROM workout_exercises WHERE workout_id = ? ORDER BY position",
+            (workout_id,)
+        ).fetchall()
+        return {
+            "date": date,
+            "total_time": total_time,
+            "exercises": [self._exercise_entry(exercise) for exercise in exercises],
+            "average_difficulty": average_difficulty
+        }
+
+    def latest_saved_id(self):
+        with self._lock:
+            row = self.conn.execute("SELECT id FROM workouts ORDER BY rowid DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def iter_all(self):
+        # The lock is taken per workout rather than held while the caller
+        # consumes the generator, so other threads are not blocked meanwhile
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, date, total_time, average_difficulty FROM workouts ORDER BY date"
+            ).fetchall()
+        for row in rows:
+            with self._lock:
+                workout = self._workout(row)
+            yield row[0], workout
+
+    def recent_workouts(self, limit=None, offset=0):
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, date, total_time, average_difficulty FROM workouts "
+                "ORDER BY date DESC LIMIT ? OFFSET ?",
+                (-1 if limit is None else limit, offset)
+            ).fetchall()
+            return [(row[0], self._workout(row)) for row in rows]
+
+    def exercise_history(self, exercise_id):
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT we.workout_id, w.date, we.id, we.exercise_id, we.exercise_name, we.muscle_mask, "
+                "we.planned_sets, we.planned_reps, we.completed_sets, we.recommended_rest "
+                "FROM workout_exercises we JOIN workouts w ON w.id = we.workout_id "
+                "WHERE we.exercise_id = ? ORDER BY w.date DESC",
+                (exercise_id,)
+            ).fetchall()
+            return [(row[0], row[1], self._exercise_entry(row[2:])) for row in rows]
+
+    def workouts_training(self, all_of):
+        # Workouts that covered every muscle group in the mask, newest first
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, date, total_time, average_difficulty FROM workouts "
+                "WHERE muscle_mask & ? = ? ORDER BY date DESC",
+                (all_of, all_of)
+            ).fetchall()
+            return [(row[0], self._workout(row)) for row in rows]
+
+
+def open_history_store(engine="json", snapshot_path="workout_history.json",
+                       journal_path="workout_history.ndjson", db_path="workout_history.db", writer=None,
+                       recent_limit=None, recent_days=None):
+    # recent_limit / recent_days open the JSON store with only a recent window
+    # loaded; older workouts stream in as the history is paged back
+    if engine == "sqlite":
+        is_new = not os.path.exists(db_path)
+        store = SqliteHistoryStore(db_path)
+        if is_new:
+            # First run on SQLite: carry over the existing JSON history once
+            store.import_workouts(iter_workouts(snapshot_path, journal_path))
+        return store
+
+    if recent_limit is None and recent_days is None:
+        return JournalHistoryStore(journal_path, load_workout_history(snapshot_path, journal_path), writer,
+                                   snapshot_path=snapshot_path)
+
+    store = JournalHistoryStore(journal_path, writer=writer, snapshot_path=snapshot_path,
+                                older=iter_workouts_newest_first(snapshot_path, journal_path))
+    if recent_days is not None:
+        since = (datetime.now() - timedelta(days=recent_days)).isoformat()
+        store._load_older(since=since)
+    if recent_limit is not None:
+        store._load_older(count=max(0, recent_limit - len(store.workouts)))
+    return store
+
+
+class BackgroundWriter:
+    # Persistence worker so the Tk thread never waits on disk. Whole-file
+    # saves to the same path are coalesced (only the newest snapshot is
+    # written, atomically) and journal appends queued during a write go out
+    # together in one append + fsync.
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._snapshots = {}
+        self._appends = {}
+        self._writing = False
+        self._closed = False
+        self.last_error = None
+        self._thread = threading.Thread(target=self._run, name="workout-writer", daemon=True)
+        self._thread.start()
+
+    def save_json(self, path, data, indent=4):
+        # `data` must not be mutated after it is handed over
+        with self._cond:
+            self._snapshots[path] = (data, indent)
+            self._cond.notify()
+
+    def append(self, path, record):
+        with self._cond:
+            self._appends.setdefault(path, []).append(record)
+            self._cond.notify()
+
+    @property
+    def pending(self):
+        with self._cond:
+            return self._writing or bool(self._snapshots) or bool(self._appends)
+
+    def flush(self, timeout=None):
+        # Block until everything queued so far is on disk
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not (self._writing or self._snapshots or self._appends), timeout)
+
+    def close(self, timeout=None):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._snapshots or self._appends or self._closed)
+                if self._closed and not (self._snapshots or self._appends):
+                    return
+                snapshots, self._snapshots = self._snapshots, {}
+                appends, self._appends = self._appends, {}
+                self._writing = True
+
+            error = None
+            for path, records in appends.items():
+                try:
+                    append_journal_records(path, records)
+                except Exception as e:
+                    error = f"{path}: {e}"
+            for path, (data, indent) in snapshots.items():
+                try:
+                    write_json_atomic(path, data, indent)
+                except Exception as e:
+                    error = f"{path}: {e}"
+
+            with self._cond:
+                self._writing = False
+                self.last_error = error
+                if error:
+                    print(f"Error saving data: {error}")
+                self._cond.notify_all()
+
+
+# Bump when the layout of cached exercise records changes
+EXERCISE_CACHE_VERSION = 1
+
+
+def load_exercise_records(path, cache_path=None):
+    # Exercise database as {key: (id, name, muscle_groups, description,
+    # equipment_needed, difficulty_level, recommended_rest)}. A marshal
+    # snapshot next to the JSON file is used while the file's mtime and size
+    # still match, so the JSON is only parsed after it has changed.
+    if cache_path is None:
+        cache_path = os.path.splitext(path)[0] + ".cache"
+
+    stat = os.stat(path)
+    cache_key = (EXERCISE_CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+
+    try:
+        with open(cache_path, "rb") as f:
+            cached_key, records = marshal.loads(f.read())
+        if cached_key == cache_key:
+            return records
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    with open(path, "r") as f:
+        data = json.load(f)
+
+    records = {}
+    for key, ex in data.items():
+        records[key] = (
+            ex["id"],
+            ex["name"],
+            tuple(ex["muscle_groups"]),
+            ex["description"],
+            ex["equipment_needed"],
+            ex["difficulty_level"],
+            ex["recommended_rest"]
+        )
+
+    try:
+        directory = os.path.dirname(os.path.abspath(cache_path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".cache", dir=directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(marshal.dumps((cache_key, records)))
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Could not write exercise cache: {e}")
+
+    return records
@@ -0,0 +1,323 @@
+import heapq
+import itertools
+import math
+import time
+from array import array
+from bisect import bisect_right
+
+
+def format_clock(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+class CountdownTimer:
+    # Countdown scheduled against a time.monotonic() deadline. Remaining
+    # time is always computed from the deadline, so however late a tick
+    # runs the timer never drifts; pausing stores the exact time left and
+    # resuming sets a new deadline from it.
+    def __init__(self, duration, clock=time.monotonic):
+        self.duration = duration
+        self.clock = clock
+        self._deadline = None
+        self._remaining = float(duration)
+
+    @property
+    def running(self):
+        return self._deadline is not None
+
+    @property
+    def paused(self):
+        return self._deadline is None and 0 < self._remaining < self.duration
+
+    def start(self):
+        # Start, or resume after pause(); no-op while running
+        if self._deadline is None:
+            self._deadline = self.clock() + self._remaining
+
+    resume = start
+
+    def pause(self):
+        if self._deadline is not None:
+            self._remaining = max(0.0, self._deadline - self.clock())
+            self._deadline = None
+
+    def extend(self, seconds):
+        # Add time to the countdown, running or paused
+        self.duration += seconds
+        if self._deadline is not None:
+            self._deadline += seconds
+        else:
+            self._remaining += seconds
+
+    def reset(self, duration=None):
+        if duration is not None:
+            self.duration = duration
+        self._deadline = None
+        self._remaining = float(self.duration)
+
+    def remaining(self):
+        # Exact seconds left
+        if self._deadline is None:
+            return self._remaining
+        return max(0.0, self._deadline - self.clock())
+
+    def remaining_seconds(self):
+        # Whole seconds left as a countdown shows them: 04:59 only once a
+        # full second of a 5-minute timer has passed
+        return math.ceil(self.remaining())
+
+    def elapsed(self):
+        return self.duration - self.remaining()
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+    def next_tick(self):
+        # Seconds until the displayed whole second changes (or the timer
+        # expires), for scheduling the next update exactly on it
+        remaining = self.remaining()
+        if remaining <= 0:
+            return 0.0
+        return remaining - (math.ceil(remaining) - 1)
+
+
+class IntervalSchedule:
+    # An interval plan compiled once into flat arrays: boundaries[i] is the
+    # offset in seconds at which phase i ends, with kinds[i] ("work" or
+    # "rest") and rounds[i] alongside. Finding the phase for an elapsed
+    # time is a binary search over the boundaries.
+    def __init__(self, name, phases):
+        # `phases` is a sequence of (kind, seconds); zero-length phases are dropped
+        self.name = name
+        self.boundaries = array("d")
+        self.kinds = []
+        self.rounds = array("I")
+        total = 0.0
+        round_number = 0
+        for kind, seconds in phases:
+            if seconds <= 0:
+                continue
+            if kind == "work" or not round_number:
+                round_number += 1
+            total += seconds
+            self.boundaries.append(total)
+            self.kinds.append(kind)
+            self.rounds.append(round_number)
+        if not self.boundaries:
+            raise ValueError("An interval plan needs at least one phase")
+        self.total = total
+        self.round_count = round_number
+
+    def __len__(self):
+        return len(self.boundaries)
+
+    def phase_at(self, elapsed):
+        return min(bisect_right(self.boundaries, elapsed), len(self.boundaries) - 1)
+
+    def phase_start(self, index):
+        return self.boundaries[index - 1] if index else 0.0
+
+    def phase_seconds(self, index):
+        return self.boundaries[index] - self.phase_start(index)
+
+
+def tabata(rounds=8, work=20, rest=10):
+    phases = []
+    for i in range(rounds):
+        phases.append(("work", work))
+        if i < rounds - 1:
+            phases.append(("rest", rest))
+    return IntervalSchedule("Tabata", phases)
+
+
+def emom(minutes=10):
+    # A new round starts every minute on the minute
+    return IntervalSchedule("EMOM", [("work", 60)] * minutes)
+
+
+def amrap(minutes=12):
+    return IntervalSchedule("AMRAP", [("work", minutes * 60)])
+
+
+def ladder(intervals):
+    # `intervals` is [(work seconds, rest seconds)]
+    phases = []
+    for work, rest in intervals:
+        phases.append(("work", work))
+        phases.append(("rest", rest))
+    return IntervalSchedule("Custom", phases)
+
+
+INTERVAL_MODES = {
+    "Tabata": "8x20/10",
+    "EMOM": "10",
+    "AMRAP": "12",
+    "Custom": "30/15, 40/15, 50/15",
+}
+
+
+def parse_interval_plan(mode, text):
+    # Compile a plan from the timer app's settings. Tabata takes
+    # ROUNDSxWORK/REST, EMOM and AMRAP take minutes, and Custom takes a
+    # comma-separated WORK/REST ladder. Raises ValueError on bad input.
+    text = text.strip()
+    if mode == "Tabata":
+        rounds, _, times = text.partition("x")
+        work, _, rest = times.partition("/")
+        return tabata(int(rounds), int(work), int(rest or 0))
+    if mode == "EMOM":
+        return emom(int(text))
+    if mode == "AMRAP":
+        return amrap(int(text))
+    if mode == "Custom":
+        intervals = []
+        for step in text.split(","):
+            work, _, rest = step.strip().partition("/")
+            intervals.append((int(work), int(rest or 0)))
+        return ladder(intervals)
+    raise ValueError(f"Unknown interval mode: {mode}")
+
+
+class IntervalTimer(CountdownTimer):
+    # Counts down a whole IntervalSchedule against one monotonic deadline,
+    # so pausing and resuming stay exact across phases. Updates land on
+    # every tenth of a second (and so on every phase boundary).
+    RESOLUTION = 10
+
+    def __init__(self, schedule, clock=time.monotonic):
+        super().__init__(schedule.total, clock)
+        self.schedule = schedule
+
+    def remaining_seconds(self):
+        # Time left in tenths of a second
+        return math.ceil(round(self.remaining() * self.RESOLUTION, 6)) / self.RESOLUTION
+
+    def next_tick(self):
+        remaining = self.remaining()
+        if remaining <= 0:
+            return 0.0
+        steps = math.ceil(round(remaining * self.RESOLUTION, 6))
+        return max(0.001, remaining - (steps - 1) / self.RESOLUTION)
+
+    def phase(self):
+        # (phase index, seconds left in the phase)
+        elapsed = self.elapsed()
+        index = self.schedule.phase_at(elapsed)
+        return index, max(0.0, self.schedule.boundaries[index] - elapsed)
+
+
+def format_tenths(seconds):
+    tenths = math.ceil(round(seconds * 10, 6))
+    minutes, tenths = divmod(tenths, 600)
+    return f"{minutes:02d}:{tenths // 10:02d}.{tenths % 10}"
+
+
+class TimerScheduler:
+    # Runs any number of countdowns from one Tk widget's event loop. Every
+    # running timer's next update sits in a heap keyed by when its displayed
+    # second changes, and a single after() callback is kept pending for the
+    # earliest one, so no threads are involved, nothing is scheduled while
+    # no timer runs, and pausing or cancelling takes effect at once.
+    def __init__(self, widget, clock=time.monotonic):
+        self.widget = widget
+        self.clock = clock
+        self._heap = []
+        self._sequence = itertools.count()
+        self._after_id = None
+        self._after_due = None
+
+    def add(self, timer, on_tick, on_done=None):
+        # Returns a ScheduledTimer; call start() on it to begin the countdown.
+        # The timer should use the same clock as the scheduler.
+        return ScheduledTimer(self, timer, on_tick, on_done)
+
+    def start(self, timer, on_tick, on_done=None):
+        scheduled = self.add(timer, on_tick, on_done)
+        scheduled.start()
+        return scheduled
+
+    def _run(self, scheduled):
+        # Show the timer's current second, then queue its next change
+        timer = scheduled.timer
+        scheduled.on_tick(timer.remaining_seconds())
+        if not scheduled.active:
+            return
+        if timer.expired:
+            scheduled.active = False
+            timer.pause()
+            if scheduled.on_done is not None:
+                scheduled.on_done()
+            return
+        heapq.heappush(self._heap, (self.clock() + timer.next_tick(), next(self._sequence),
+                                    scheduled.version, scheduled))
+
+    def _reschedule(self):
+        # Keep exactly one after() pending, for the earliest live entry
+        heap = self._heap
+        while heap and not heap[0][3].is_current(heap[0][2]):
+            heapq.heappop(heap)
+        due = heap[0][0] if heap else None
+        if due == self._after_due:
+            return
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        self._after_due = due
+        if due is not None:
+            # Round up so the callback lands just after the second boundary
+            delay = max(0, math.ceil((due - self.clock()) * 1000))
+            self._after_id = self.widget.after(delay, self._on_after)
+
+    def _on_after(self):
+        self._after_id = None
+        self._after_due = None
+        now = self.clock()
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, _, version, scheduled = heapq.heappop(heap)
+            if scheduled.is_current(version):
+                self._run(scheduled)
+        self._reschedule()
+
+    @property
+    def idle(self):
+        return self._after_id is None
+
+
+class ScheduledTimer:
+    # A CountdownTimer registered with a TimerScheduler. on_tick(whole
+    # seconds left) runs when started or resumed and whenever the displayed
+    # second changes; on_done() runs once when the countdown expires.
+    def __init__(self, scheduler, timer, on_tick, on_done=None):
+        self.scheduler = scheduler
+        self.timer = timer
+        self.on_tick = on_tick
+        self.on_done = on_done
+        self.active = False
+        # Bumped on every pause so queued updates from before it are ignored
+        self.version = 0
+
+    def is_current(self, version):
+        return self.active and version == self.version
+
+    def start(self):
+        if not self.active:
+            self.active = True
+            self.timer.start()
+            self.scheduler._run(self)
+            self.scheduler._reschedule()
+
+    resume = start
+
+    def pause(self):
+        if self.active:
+            self.active = False
+            self.version += 1
+            self.timer.pause()
+            self.scheduler._reschedule()
+
+    def cancel(self):
+        self.pause()
+        self.timer.reset()
@@ -0,0 +1,270 @@
+import tkinter as tk
+from difflib import SequenceMatcher
+from tkinter import ttk
+
+
+def diff_rows(old, new):
+    # Opcodes turning the rows shown before into the rows to show now, as
+    # difflib gives them: ("equal" | "replace" | "delete" | "insert", i1, i2,
+    # j1, j2). Rows are (id, content) pairs, so a row whose content changed
+    # is redrawn even when its id did not move.
+    return SequenceMatcher(None, old, new, autojunk=False).get_opcodes()
+
+
+class VirtualList:
+    # Base for list widgets that show a window of a long sequence of ids.
+    # Only as many rows as fit on screen exist as Tk items; scrolling and
+    # filter changes recompute that window, diff it against the rows on
+    # screen and apply only the inserts, deletes and moves between them, so
+    # the cost is O(visible rows) however long the sequence is and Tk work
+    # is proportional to what changed. The sequence only needs len(),
+    # slicing and index() (e.g. ExerciseIndex.ordered() or a plain list).
+    #
+    # Subclasses create the inner widget and implement _row_content,
+    # _resize_rows, _fill_rows, _highlight_row and _row_at_event.
+    def __init__(self, parent, on_select=None):
+        self.frame = ttk.Frame(parent)
+        self.on_select = on_select
+        self.ids = []
+        self.offset = 0
+        self.rows = 0
+        self.selected_id = None
+        # (id, content) of each row as last drawn
+        self.shown = []
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def _bind_inner(self, widget):
+        widget.bind("<Configure>", lambda e: self._on_configure())
+        widget.bind("<MouseWheel>", lambda e: self.yview("scroll", -1 if e.delta > 0 else 1, "units"))
+        widget.bind("<Button-4>", lambda e: self.yview("scroll", -1, "units"))
+        widget.bind("<Button-5>", lambda e: self.yview("scroll", 1, "units"))
+        widget.bind("<Button-1>", self._on_click)
+        widget.bind("<Up>", lambda e: self._move_selection(-1))
+        widget.bind("<Down>", lambda e: self._move_selection(1))
+        widget.bind("<Prior>", lambda e: self._move_selection(-max(1, self.rows - 1)))
+        widget.bind("<Next>", lambda e: self._move_selection(max(1, self.rows - 1)))
+
+    def set_ids(self, ids):
+        # Show a new sequence, keeping the selection if it is still listed.
+        # The view stays where it was: a visible selected row keeps its line
+        # on screen, otherwise the top row stays on top if it is still there
+        window = self.ids[self.offset:self.offset + self.rows]
+        anchor, line = (window[0], 0) if window else (None, 0)
+        if self.selected_id in window:
+            anchor, line = self.selected_id, window.index(self.selected_id)
+        self.ids = ids
+        if self.selected_id is not None and self._position(self.selected_id) is None:
+            self.selected_id = None
+        position = self._position(anchor) if anchor is not None else None
+        self.offset = 0 if position is None else position - line
+        self.refresh()
+
+    def _position(self, exercise_id):
+        try:
+            return self.ids.index(exercise_id)
+        except ValueError:
+            return None
+
+    def refresh(self):
+        # Redraw only the rows that differ from what is on screen; call
+        # again after the data behind the visible rows changes
+        self.offset = max(0, min(self.offset, len(self.ids) - self.rows))
+        window = self.ids[self.offset:self.offset + self.rows]
+        self._fill_rows([(exercise_id, self._row_content(exercise_id)) for exercise_id in window])
+        self._highlight_row(window.index(self.selected_id) if self.selected_id in window else None)
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        total = len(self.ids)
+        if total <= self.rows:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + self.rows) / total)
+
+    def yview(self, *args):
+        # Scrollbar protocol: ("moveto", fraction) or ("scroll", n, "units"|"pages")
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * len(self.ids))
+        elif args[0] == "scroll":
+            step = self.rows if args[2] == "pages" else 1
+            self.offset += int(args[1]) * step
+        self.refresh()
+
+    def see(self, position):
+        if position < self.offset:
+            self.offset = position
+        elif position >= self.offset + self.rows:
+            self.offset = position - self.rows + 1
+        self.refresh()
+
+    def _on_configure(self):
+        rows = self._visible_rows()
+        if rows != self.rows:
+            self.rows = rows
+            self._resize_rows(rows)
+            self.refresh()
+            # Row metrics are only known once rows are drawn; check again
+            self.frame.after_idle(self._on_configure)
+
+    def _on_click(self, event):
+        row = self._row_at_event(event)
+        if row is None or self.offset + row >= len(self.ids):
+            return None
+        event.widget.focus_set()
+        self._select(self.ids[self.offset + row])
+        return "break"
+
+    def _move_selection(self, delta):
+        if not len(self.ids):
+            return "break"
+        window = self.ids[self.offset:self.offset + self.rows]
+        if self.selected_id in window:
+            position = self.offset + window.index(self.selected_id) + delta
+        else:
+            position = self.offset if delta > 0 else self.offset + len(window) - 1
+        position = max(0, min(position, len(self.ids) - 1))
+        self.selected_id = self.ids[position]
+        self.see(position)
+        if self.on_select is not None:
+            self.on_select(self.selected_id)
+        return "break"
+
+    def _select(self, exercise_id):
+        self.selected_id = exercise_id
+        self.refresh()
+        if self.on_select is not None:
+            self.on_select(exercise_id)
+
+
+class VirtualTreeview(VirtualList):
+    # Multi-column list on a ttk.Treeview with headings. `row_values(id)`
+    # gives the column values for one id. The tree keeps one item per
+    # screen line; rows that scroll off are recycled for rows coming in.
+    def __init__(self, parent, columns, row_values, on_select=None):
+        super().__init__(parent, on_select)
+        self.row_values = row_values
+        self.blank = (None, ("",) * len(columns))
+        self.tree = ttk.Treeview(self.frame, columns=[name for name, _, _ in columns],
+                                 show="headings", selectmode="none")
+        for name, heading, width in columns:
+            self.tree.heading(name, text=heading)
+            self.tree.column(name, width=width)
+        self.tree.pack(side="left", expand=True, fill="both")
+        self.items = []
+        self.highlighted = None
+        self._bind_inner(self.tree)
+        self.tree.tag_configure("selected", background="#cce0ff")
+
+    def _row_content(self, exercise_id):
+        return tuple(self.row_values(exercise_id))
+
+    def _visible_rows(self):
+        # Rows that fit below the heading; the first row's bbox gives both
+        # the heading height and the row height once it has been drawn
+        height = self.tree.winfo_height()
+        row_height = 20
+        heading = row_height
+        if self.items:
+            bbox = self.tree.bbox(self.items[0])
+            if bbox:
+                heading, row_height = bbox[1], bbox[3]
+        return max(1, (height - heading) // row_height)
+
+    def _resize_rows(self, rows):
+        while len(self.items) < rows:
+            self.items.append(self.tree.insert("", "end", values=self.blank[1]))
+            self.shown.append(self.blank)
+        while len(self.items) > rows:
+            item = self.items.pop()
+            self.shown.pop()
+            if item == self.highlighted:
+                self.highlighted = None
+            self.tree.delete(item)
+
+    def _fill_rows(self, rows):
+        # Lines past the end of the sequence are blank rows
+        rows = rows + [self.blank] * (len(self.items) - len(rows))
+        items = [None] * len(rows)
+        spare = []
+        for tag, i1, i2, j1, j2 in diff_rows(self.shown, rows):
+            if tag == "equal":
+                items[j1:j2] = self.items[i1:i2]
+            else:
+                spare.extend(self.items[i1:i2])
+        if spare:
+            # Unchanged rows keep their relative order, so detaching the
+            # recycled items and re-placing them in line order leaves every
+            # item on its line
+            self.tree.detach(*spare)
+            spare.reverse()
+            for line, item in enumerate(items):
+                if item is None:
+                    item = items[line] = spare.pop()
+                    self.tree.item(item, values=rows[line][1])
+                    self.tree.move(item, "", line)
+        self.items = items
+        self.shown = rows
+
+    def _highlight_row(self, row):
+        item = self.items[row] if row is not None else None
+        if item != self.highlighted:
+            if self.highlighted is not None:
+                self.tree.item(self.highlighted, tags=())
+            if item is not None:
+                self.tree.item(item, tags=("selected",))
+            self.highlighted = item
+
+    def _row_at_event(self, event):
+        item = self.tree.identify_row(event.y)
+        return self.items.index(item) if item in self.items else None
+
+
+class VirtualListbox(VirtualList):
+    # Single-column list on a tk.Listbox. `row_text(id)` gives the line shown.
+    def __init__(self, parent, row_text, on_select=None):
+        super().__init__(parent, on_select)
+        self.row_text = row_text
+        self.listbox = tk.Listbox(self.frame, selectmode="single", exportselection=False)
+        self.listbox.pack(side="left", expand=True, fill="both")
+        self._bind_inner(self.listbox)
+
+    def _row_content(self, exercise_id):
+        return self.row_text(exercise_id)
+
+    def _visible_rows(self):
+        # Listbox lines all share the font's line height
+        self.listbox.insert(tk.END, "")
+        bbox = self.listbox.bbox(0)
+        self.listbox.delete(tk.END)
+        row_height = bbox[3] + 1 if bbox else 16
+        return max(1, self.listbox.winfo_height() // row_height)
+
+    def _resize_rows(self, rows):
+        pass
+
+    def _fill_rows(self, rows):
+        # Patch from the bottom up so earlier line numbers stay valid
+        for tag, i1, i2, j1, j2 in reversed(diff_rows(self.shown, rows)):
+            if tag in ("replace", "delete"):
+                self.listbox.delete(i1, i2 - 1)
+            if tag in ("replace", "insert"):
+                self.listbox.insert(i1, *[text for _, text in rows[j1:j2]])
+        self.shown = rows
+
+    def _highlight_row(self, row):
+        self.listbox.selection_clear(0, tk.END)
+        if row is not None:
+            self.listbox.selection_set(row)
+
+    def _row_at_event(self, event):
+        if not self.listbox.size():
+            return None
+        row = self.listbox.nearest(event.y)
+        bbox = self.listbox.bbox(row)
+        return row if bbox and event.y < bbox[1] + bbox[3] + 1 else None